@@ -1,10 +1,11 @@
-import streamlit as st
-
-pages = [
-    st.Page("app_pages/login.py", title="Login"),
-    st.Page("app_pages/main.py", title="Main")
-]
-
-pg = st.navigation(pages, position="hidden", expanded=False)
-
+import streamlit as st
+
+pages = [
+    st.Page("app_pages/login.py", title="Login"),
+    st.Page("app_pages/main.py", title="Main"),
+    st.Page("app_pages/analytics.py", title="Analytics")
+]
+
+pg = st.navigation(pages, position="hidden", expanded=False)
+
 pg.run()
\ No newline at end of file
@@ -0,0 +1,67 @@
+import streamlit as st
+
+from skyseats import analytics
+from skyseats.db import get_database
+from skyseats.schema import ensure_schema
+
+ANALYTICS_TTL = 30  # seconds a computed figure may be shown before it is recomputed
+
+st.set_page_config(page_title="Airline Seat Booking", layout="centered")
+st.title("Occupancy & Revenue")
+
+
+@st.cache_resource
+def get_airline_db():
+    db = get_database("airline.db")
+    ensure_schema(db)
+    return db
+
+
+@st.cache_data(ttl=ANALYTICS_TTL)
+def fleet_summary():
+    return analytics.fleet_summary(get_airline_db())
+
+
+@st.cache_data(ttl=ANALYTICS_TTL)
+def bookings_by_group(flight_id=None):
+    return analytics.bookings_by_group(get_airline_db(), flight_id)
+
+
+@st.cache_data(ttl=ANALYTICS_TTL)
+def row_fill(flight_id):
+    return analytics.row_fill(get_airline_db(), flight_id)
+
+
+summary = fleet_summary()
+seats = sum(flight["seats"] for flight in summary)
+booked = sum(flight["booked"] for flight in summary)
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Flights", len(summary))
+col2.metric("Load factor", f"{booked / seats:.0%}" if seats else "-")
+col3.metric("Revenue", f"₹{sum(flight['revenue'] for flight in summary):,.0f}")
+
+st.subheader("Flights")
+st.dataframe([{"Flight": flight["code"], "Seats": flight["seats"], "Booked": flight["booked"],
+               "Load factor": f"{flight['load_factor']:.0%}", "Revenue (₹)": round(flight["revenue"], 2)}
+              for flight in summary], hide_index=True)
+
+flights = {flight["code"]: flight["flight_id"] for flight in summary}
+flight_code = st.selectbox("Flight", ["All flights", *flights])
+flight_id = flights.get(flight_code)
+
+st.subheader("Bookings by passenger type")
+groups = bookings_by_group(flight_id)
+st.bar_chart({"Bookings": {name or "General": count for name, (count, _) in groups.items()}})
+st.dataframe([{"Passenger type": name or "General", "Bookings": count, "Revenue (₹)": round(revenue, 2)}
+              for name, (count, revenue) in groups.items()], hide_index=True)
+
+if flight_id is not None:
+    st.subheader("Fill by row")
+    st.bar_chart({"Booked": {f"{row:02d}": booked for row, _, booked in row_fill(flight_id)},
+                  "Free": {f"{row:02d}": seats - booked for row, seats, booked in row_fill(flight_id)}},
+                 stack=True)
+
+st.caption(f"Figures are recomputed at most every {ANALYTICS_TTL} seconds.")
+if st.button("Back to booking"):
+    st.switch_page("app_pages/main.py")
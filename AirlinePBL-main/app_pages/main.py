@@ -1,271 +1,228 @@
-import streamlit as st
-import sqlite3
-import hashlib
-from collections import deque
-import streamlit_extras.switch_page_button as spb
-
-class AirlineSeating:
-    def __init__(self, db_path="airline.db", rows=10, seat_labels="ABCDEF"):
-        self.db_path = db_path
-        self.rows = rows
-        self.seat_labels = seat_labels
-        self.create_table()
-        self.create_seats_if_not_exists()
-
-    def connect_db(self):
-        return sqlite3.connect(self.db_path, check_same_thread=False)
-
-    def create_table(self):
-        conn = self.connect_db()
-        cursor = conn.cursor()
-        cursor.execute('''CREATE TABLE IF NOT EXISTS seats (
-                          seat TEXT PRIMARY KEY,
-                          status TEXT,
-                          special_group TEXT DEFAULT NULL)''')
-        conn.commit()
-        conn.close()
-
-    def create_seats_if_not_exists(self):
-        conn = self.connect_db()
-        cursor = conn.cursor()
-        for row in range(1, self.rows + 1):
-            for letter in self.seat_labels:
-                seat = f"{row}{letter}"
-                cursor.execute("INSERT OR IGNORE INTO seats (seat, status) VALUES (?, ?)", (seat, "Available"))
-        conn.commit()
-        conn.close()
-
-    def get_seat_status(self, seat):
-        conn = self.connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT status FROM seats WHERE seat = ?", (seat,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else "Invalid"
-
-    def get_seat_group(self, seat):
-        conn = self.connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT special_group FROM seats WHERE seat = ?", (seat,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result and result[0] else None
-
-    def book_seat(self, seat, group_type=None):
-        if self.get_seat_status(seat) == "Available":
-            conn = self.connect_db()
-            cursor = conn.cursor()
-            cursor.execute("UPDATE seats SET status = 'Booked', special_group = ? WHERE seat = ?", (group_type, seat))
-            conn.commit()
-            conn.close()
-            return True, f"Seat {seat} booked successfully!"
-        elif self.get_seat_status(seat) == "Invalid":
-            return False, f"Invalid seat number: {seat}"
-        else:
-            return False, f"Seat {seat} is already booked!"
-
-    def cancel_seat(self, seat):
-        if self.get_seat_status(seat) == "Booked":
-            conn = self.connect_db()
-            cursor = conn.cursor()
-            cursor.execute("UPDATE seats SET status = 'Available', special_group = NULL WHERE seat = ?", (seat,))
-            conn.commit()
-            conn.close()
-            return True, f"Seat {seat} canceled successfully."
-        elif self.get_seat_status(seat) == "Invalid":
-            return False, f"Invalid seat number: {seat}"
-        else:
-            return False, f"Seat {seat} is not currently booked."
-    def calculate_price(self, group_type=None):
-        base_price = 500.0  # base fare in INR
-        if group_type == "Elderly":
-            return base_price * 0.8  # 20% discount
-        elif group_type == "Disabled":
-            return base_price * 0.7  # 30% discount
-        elif group_type == "Infant":
-            return base_price * 0.5  # 50% discount
-        elif group_type == "Silent":
-            return base_price * 0.9  # 10% discount
-        return base_price
-    
-    def auto_assign_best_seat(self, group_type=None):
-        for row in range(1, self.rows + 1):
-            for letter in self.seat_labels:
-                seat = f"{row}{letter}"
-                if self.get_seat_status(seat) == "Available":
-                    success, msg = self.book_seat(seat, group_type)
-                    if success:
-                        return seat, f"{msg} (Auto-assigned)"
-        return None, "No available seats to auto-assign."
-
-
-    def get_seating_display(self):
-        layout = []
-        for row in range(1, self.rows + 1):
-            row_display = []
-            for idx, letter in enumerate(self.seat_labels):
-                seat = f"{row}{letter}"
-                status = self.get_seat_status(seat)
-                group = self.get_seat_group(seat)
-                if group == "Elderly":
-                    color = "#ffcc00"
-                elif group == "Disabled":
-                    color = "#6f42c1"
-                elif group == "Infant":
-                    color = "#17a2b8"
-                elif group == "Silent":
-                    color = "#343a40"
-                else:
-                    color = "#28a745" if status == "Available" else "#dc3545"
-                row_display.append((seat, color, group))
-                if idx == 2:
-                    row_display.append(("AISLE", "#ffffff", None))
-            layout.append(row_display)
-            if row == 5:
-                layout.append([("ROW GAP", "#ffffff", None)])
-        return layout
-
-    def seat_to_index(self, seat):
-        row = int(seat[:-1])
-        col = self.seat_labels.index(seat[-1])
-        return row - 1, col
-
-    def index_to_seat(self, row, col):
-        return f"{row + 1}{self.seat_labels[col]}"
-
-    def find_adjacent_seats_bfs(self, start_seat, group_size):
-        row_idx, col_idx = self.seat_to_index(start_seat)
-        max_col = len(self.seat_labels)
-        visited = set()
-        queue = deque([(row_idx, col_idx, [])])
-
-        while queue:
-            r, c, path = queue.popleft()
-            seat = self.index_to_seat(r, c)
-
-            if (r, c) in visited or c >= max_col:
-                continue
-            visited.add((r, c))
-
-            if self.get_seat_status(seat) != "Available":
-                continue
-
-            path = path + [seat]
-            if len(path) == group_size:
-                return path
-
-            if c + 1 < max_col:
-                queue.append((r, c + 1, path))
-
-        return []
-
-st.set_page_config(page_title="Airline Seat Booking", layout="centered")
-st.title("\u2708\ufe0f SkySeats: Smart Airline Seat Allocation ")
-
-if 'airline' not in st.session_state:
-    st.session_state.airline = AirlineSeating()
-
-airline = st.session_state.airline
-
-action = st.radio("Choose action:", [
-    "Book a seat",
-    "Cancel a seat",
-    "Auto-Assign with Preferences",
-    "Check seat price",
-    "Find Adjacent Seats (BFS)"
-])
-
-seat_input = st.text_input("Enter seat number (e.g., 1A)").upper()
-group_type = None
-group_size = 1
-
-if action in ["Auto-Assign with Preferences", "Check seat price"]:
-    group_type = st.selectbox("Select passenger type:", ["None", "Elderly", "Disabled", "Infant", "Silent"])
-    if group_type == "None":
-        group_type = None
-
-if action == "Find Adjacent Seats (BFS)":
-    group_size = st.number_input("Enter group size:", min_value=1, max_value=6, value=2)
-
-if st.button("Submit"):
-    if action == "Find Adjacent Seats (BFS)":
-        if seat_input:
-            result = airline.find_adjacent_seats_bfs(seat_input, group_size)
-            if result:
-                st.success(f"Adjacent available seats: {', '.join(result)}")
-            else:
-                st.warning("No adjacent seats available for the group size.")
-
-    elif action == "Auto-Assign with Preferences":
-        seat, msg = airline.auto_assign_best_seat(group_type)
-        if seat:
-            st.success(msg)
-            price = airline.calculate_price(group_type)
-            st.markdown(f"**Total fare: ₹{price:.2f}**")
-        else:
-            st.warning(msg)
-
-    elif action == "Check seat price":
-        if seat_input:
-            status = airline.get_seat_status(seat_input)
-            if status == "Invalid":
-                st.warning("Invalid seat number.")
-            elif status == "Booked":
-                st.warning(f"Seat {seat_input} is already booked.")
-            else:
-                price = airline.calculate_price(group_type)
-                st.success(f"Price for seat {seat_input} ({group_type or 'General'}): ₹{price:.2f}")
-        else:
-            st.error("Please enter a seat number to check price.")
-
-    elif seat_input:
-        if action == "Book a seat":
-            success, msg = airline.book_seat(seat_input, group_type)
-            if success:
-                st.success(msg)
-                price = airline.calculate_price(group_type)
-                st.markdown(f"**Total fare: ₹{price:.2f}**")
-            else:
-                st.warning(msg)
-        else:
-            success, msg = airline.cancel_seat(seat_input)
-            if success:
-                st.success(msg)
-            else:
-                st.warning(msg)
-    else:
-        st.error("Please enter a valid seat number.")
-
-st.subheader("Seating Layout")
-seating = airline.get_seating_display()
-
-for row in seating:
-    if any(seat[0] == "ROW GAP" for seat in row):
-        st.markdown("<div style='height:20px'></div>", unsafe_allow_html=True)
-        continue
-
-    cols = st.columns(len(row))
-    for i, (seat_label, color, group) in enumerate(row):
-        if seat_label == "AISLE":
-            cols[i].markdown("<div style='width: 20px;'></div>", unsafe_allow_html=True)
-        else:
-            label_display = f"{seat_label}"
-            if group:
-                label_display += f"<br><span style='font-size:10px;'>({group})</span>"
-            cols[i].markdown(
-                f"""
-                <div style='
-                    background-color:{color};
-                    text-align:center;
-                    color:white;
-                    width: 80px;
-                    height: 50px;
-                    line-height: 1.2em;
-                    border-radius:10px;
-                    font-weight:bold;
-                    font-size:14px;
-                    margin: 4px auto;
-                    padding-top: 5px;
-                '>{label_display}</div>
-                """, unsafe_allow_html=True
-            )
\ No newline at end of file
+import io
+import os
+import uuid
+from itertools import accumulate
+
+import streamlit as st
+import streamlit_extras.switch_page_button as spb
+
+from skyseats.flights import Airline
+from skyseats.layouts import LAYOUTS
+from skyseats.manifest import export_manifest, import_manifest, manifest_format
+from skyseats.metrics import metrics
+from skyseats.preferences import PREFERENCES
+
+if metrics.enabled:
+    metrics.start_rerun()
+
+st.set_page_config(page_title="Airline Seat Booking", layout="centered")
+st.title("\u2708\ufe0f SkySeats: Smart Airline Seat Allocation ")
+
+
+@st.cache_resource
+def get_fleet():
+    return Airline(write_queue=os.environ.get("SKYSEATS_WRITE_QUEUE") == "1")
+
+
+fleet = get_fleet()
+
+with st.sidebar.expander("Add a flight"):
+    new_code = st.text_input("Flight code").strip().upper()
+    new_layout = st.selectbox("Aircraft", [*LAYOUTS, "Custom"])
+    if new_layout == "Custom":
+        new_rows = st.number_input("Rows", min_value=1, max_value=100, value=10)
+        new_blocks = st.text_input("Seat letters, a space for each aisle", value="ABC DEF").upper().split()
+    else:
+        new_blocks = LAYOUTS[new_layout].blocks
+    if st.button("Create flight"):
+        if new_code and new_blocks:
+            if new_layout == "Custom":
+                aisles = tuple(accumulate(len(block) for block in new_blocks[:-1]))
+                flight_id, msg = fleet.create_flight(new_code, new_rows, "".join(new_blocks), aisles)
+            else:
+                flight_id, msg = fleet.create_flight(new_code, layout=new_layout)
+            if flight_id:
+                st.success(msg)
+            else:
+                st.warning(msg)
+        else:
+            st.error("Please enter a flight code and seat letters.")
+
+flights = {code: flight_id for flight_id, code in fleet.list_flights()}
+flight_code = st.selectbox("Flight", list(flights))
+airline = fleet.get_flight(flights[flight_code])
+# Holds belong to the logged-in user, or to this browser session otherwise.
+holder = st.session_state.setdefault("holder", st.session_state.get("user") or uuid.uuid4().hex)
+
+waitlisted = airline.waitlist_status(holder)
+if waitlisted == "Waiting":
+    st.info(f"You are on the waitlist for {flight_code}; a seat is assigned as soon as one frees up.")
+elif waitlisted:
+    st.success(f"A seat opened up: you were assigned seat {waitlisted} from the waitlist.")
+
+if st.sidebar.button("Occupancy & revenue"):
+    st.switch_page("app_pages/analytics.py")
+
+with st.sidebar.expander("Passenger manifest"):
+    # Built only when the button is clicked, not on every rerun.
+    def manifest_csv():
+        manifest = io.StringIO()
+        export_manifest(airline, manifest)
+        return manifest.getvalue()
+    st.download_button("Export manifest (CSV)", manifest_csv, f"{flight_code}_manifest.csv", "text/csv")
+    upload = st.file_uploader("Import manifest", type=["csv", "jsonl"])
+    if upload is not None and st.button("Import"):
+        result = import_manifest(airline, io.TextIOWrapper(upload, encoding="utf-8"), manifest_format(upload.name))
+        st.success(f"Booked {result['booked']} and canceled {result['canceled']} seats.")
+        for seat, msg in result["failures"]:
+            st.warning(msg)
+
+action = st.radio("Choose action:", [
+    "Book a seat",
+    "Hold a seat",
+    "Cancel a seat",
+    "Auto-Assign with Preferences",
+    "Check seat price",
+    "Find Adjacent Seats (BFS)",
+    "Seat several parties",
+    "Join the waitlist",
+])
+
+seat_input = st.text_input("Enter seat number (e.g., 1A)").upper()
+group_type = None
+group_size = 1
+
+if action in ["Auto-Assign with Preferences", "Check seat price", "Join the waitlist"]:
+    group_type = st.selectbox("Select passenger type:", ["None", "Elderly", "Disabled", "Infant", "Silent"])
+    if group_type == "None":
+        group_type = None
+
+preference = None
+if action == "Auto-Assign with Preferences":
+    preference = st.selectbox("Seat preference:", ["Suggested for the passenger type", *PREFERENCES])
+    if preference not in PREFERENCES:
+        preference = None
+
+if action == "Find Adjacent Seats (BFS)":
+    group_size = st.number_input("Enter group size:", min_value=1, max_value=len(airline.seats), value=2)
+    st.caption("Leave the seat number empty to search the whole cabin for the best block.")
+
+if action == "Seat several parties":
+    parties_input = st.text_input("Party sizes, with an optional passenger type (e.g., 4 2 3:Infant 2:Disabled)")
+
+if st.button("Submit"):
+    if action == "Seat several parties":
+        try:
+            parties = [(int(size), group or None) for size, _, group in
+                       (party.partition(":") for party in parties_input.split())]
+        except ValueError:
+            parties = []
+        if not parties:
+            st.error("Please enter the party sizes as whole numbers.")
+        else:
+            results = airline.allocate_parties(parties)
+            for seats, success, msg in results:
+                if success:
+                    st.success(f"{msg} {', '.join(seats)}")
+                else:
+                    st.warning(msg)
+
+    elif action == "Find Adjacent Seats (BFS)":
+        if seat_input:
+            result = airline.find_adjacent_seats_bfs(seat_input, group_size)
+            if result:
+                st.success(f"Adjacent available seats: {', '.join(result)}")
+            else:
+                st.warning("No adjacent seats available for the group size.")
+        else:
+            result = airline.find_group_block(group_size)
+            if result:
+                st.success(f"Best available block: {', '.join(result)}")
+            else:
+                st.warning("Not enough available seats for the group size.")
+
+    elif action == "Auto-Assign with Preferences":
+        seat, msg = airline.auto_assign_best_seat(group_type, preference)
+        if seat:
+            st.success(msg)
+            price = airline.get_booked_fare(seat)
+            if price is not None:
+                st.markdown(f"**Total fare: ₹{price:.2f}**")
+        else:
+            st.warning(msg)
+            st.caption("The flight is full. Join the waitlist to get the next seat that frees up.")
+
+    elif action == "Join the waitlist":
+        success, msg = airline.join_waitlist(holder, group_type)
+        if success:
+            st.success(msg)
+        else:
+            st.warning(msg)
+
+    elif action == "Check seat price":
+        if seat_input:
+            status = airline.get_seat_status(seat_input, holder)
+            if status == "Invalid":
+                st.warning("Invalid seat number.")
+            elif status == "Booked":
+                st.warning(f"Seat {seat_input} is already booked.")
+            elif status == "Held":
+                st.warning(f"Seat {seat_input} is on hold for another passenger.")
+            else:
+                price = airline.calculate_price(group_type, seat_input)
+                st.success(f"Price for seat {seat_input} ({group_type or 'General'}): ₹{price:.2f}")
+        else:
+            st.error("Please enter a seat number to check price.")
+
+    elif seat_input:
+        if action == "Hold a seat":
+            success, msg = airline.hold_seat(seat_input, holder)
+            if success:
+                st.success(msg)
+                st.caption("Book the seat before the hold runs out; canceling it releases the hold.")
+            else:
+                st.warning(msg)
+        elif action == "Book a seat":
+            price = airline.calculate_price(group_type, seat_input)
+            success, msg = airline.book_seat(seat_input, group_type, holder, price)
+            if success:
+                st.success(msg)
+                st.markdown(f"**Total fare: ₹{price:.2f}**")
+            else:
+                st.warning(msg)
+        else:
+            # A seat this session only holds is released rather than canceled.
+            success, msg = airline.release_hold(seat_input, holder)
+            if not success:
+                success, msg = airline.cancel_seat(seat_input)
+            if success:
+                st.success(msg)
+            else:
+                st.warning(msg)
+    else:
+        st.error("Please enter a valid seat number.")
+
+
+
+# The seat map refreshes itself every few seconds without rerunning the page.
+# Each tick costs one PRAGMA data_version lookup while nothing changes; the
+# rendered HTML is cached until the flight's seats or holds move.
+@st.fragment(run_every=float(os.environ.get("SKYSEATS_REFRESH_SECONDS", "2")) or None)
+def live_seat_map(airline):
+    st.markdown(airline.get_seating_html(), unsafe_allow_html=True)
+
+
+st.subheader("Seating Layout")
+live_seat_map(airline)
+
+if metrics.enabled:
+    rerun = metrics.finish_rerun()
+    with st.sidebar.expander("Debug: performance"):
+        st.markdown(f"**This rerun:** {rerun['seconds'] * 1000:.1f} ms, "
+                    f"{rerun['statements']} SQL statements, {rerun['rows']} rows")
+        st.dataframe([{"method": name, "calls": calls, "ms": seconds * 1000, "statements": statements, "rows": rows}
+                      for name, (calls, seconds, statements, rows, _) in rerun["methods"].items()],
+                     hide_index=True)
+        st.download_button("Download Prometheus metrics", metrics.export_prometheus(), "skyseats.prom", "text/plain")
+    if os.environ.get("SKYSEATS_METRICS_FILE"):
+        metrics.write_prometheus(os.environ["SKYSEATS_METRICS_FILE"])
@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from skyseats.db import PoolTimeout
+from skyseats.flights import Airline
+from skyseats.groups import plan_parties
+from skyseats.snapshot import seat_map_cache
+from skyseats.writer import BookingWriter
+
+SEAT_LABELS = "ABCDEF"
+DEFAULT_SIZES = (60, 600, 6000, 60000)
+DEFAULT_FILLS = (0.0, 0.5, 0.9)
+DEFAULT_THREADS = (1, 2, 4, 8, 16)  # 16 is more writers than the connection pool holds
+PARTY_SIZES = (1, 2, 2, 3, 4, 5, 6)  # drawn from for the batch allocation benchmark
+MAX_PARTIES = 500
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, sql):
+        with self._lock:
+            self.count += 1
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def summarize(op, seats, fill, threads, samples_ns, queries, elapsed=None, **extra):
+    samples = sorted(samples_ns)
+    count = len(samples)
+    elapsed = elapsed if elapsed is not None else sum(samples) / 1e9
+    result = {
+        "op": op,
+        "seats": seats,
+        "fill": fill,
+        "threads": threads,
+        "iterations": count,
+        "p50_ms": percentile(samples, 50) / 1e6,
+        "p90_ms": percentile(samples, 90) / 1e6,
+        "p99_ms": percentile(samples, 99) / 1e6,
+        "mean_ms": sum(samples) / count / 1e6 if count else 0.0,
+        "queries_per_op": queries / count if count else 0.0,
+        "ops_per_sec": count / elapsed if elapsed else 0.0,
+    }
+    result.update(extra)
+    return result
+
+
+def build_flight(workdir, seats, fill, rng):
+    path = os.path.join(workdir, f"bench_{seats}_{int(fill * 100)}.db")
+    airline = Airline(path)
+    flight_id, _ = airline.create_flight("BENCH", max(1, seats // len(SEAT_LABELS)), SEAT_LABELS)
+    seating = airline.get_flight(flight_id)
+    booked = rng.sample(seating.seats, int(len(seating.seats) * fill))
+    seating.book_seats((seat, None) for seat in booked)
+    return airline, seating
+
+
+def free_seats(seating):
+    seat_map = seating.get_seat_map()
+    return [seat for seat in seating.seats if seat_map.get_status(seat) == "Available"]
+
+
+def time_op(seating, counter, iterations, run, before=None, after=None):
+    samples = []
+    queries = 0
+    for _ in range(iterations):
+        state = before() if before else None
+        start_queries = counter.count
+        start = time.perf_counter_ns()
+        result = run(state)
+        samples.append(time.perf_counter_ns() - start)
+        queries += counter.count - start_queries
+        if after:
+            after(result)
+    return samples, queries
+
+
+def bench_single(seating, counter, seats, fill, iterations, rng):
+    results = []
+
+    def cold_before():
+        seat_map_cache.invalidate(seating.cache_key)
+
+    samples, queries = time_op(seating, counter, iterations, lambda _: seating.get_seating_display(), cold_before)
+    results.append(summarize("get_seating_display[cold]", seats, fill, 1, samples, queries))
+
+    seating.get_seating_display()
+    samples, queries = time_op(seating, counter, iterations, lambda _: seating.get_seating_display())
+    results.append(summarize("get_seating_display[warm]", seats, fill, 1, samples, queries))
+
+    def release(result):
+        if result[0]:
+            seating.cancel_seat(result[0])
+
+    samples, queries = time_op(seating, counter, iterations, lambda _: seating.auto_assign_best_seat(), after=release)
+    results.append(summarize("auto_assign_best_seat", seats, fill, 1, samples, queries))
+
+    samples, queries = time_op(seating, counter, iterations,
+                               lambda start: seating.find_adjacent_seats_bfs(start, 3),
+                               before=lambda: rng.choice(seating.seats))
+    results.append(summarize("find_adjacent_seats_bfs", seats, fill, 1, samples, queries))
+
+    # Planning only, so every iteration sees the same cabin.
+    sizes = [rng.choice(PARTY_SIZES) for _ in range(min(MAX_PARTIES, max(1, seats // 4)))]
+    samples, queries = time_op(seating, counter, iterations,
+                               lambda _: plan_parties(seating.get_available(), seating.aisles, sizes))
+    results.append(summarize("plan_parties", seats, fill, 1, samples, queries, parties=len(sizes)))
+
+    available = free_seats(seating)
+    if available:
+        samples, queries = time_op(seating, counter, iterations,
+                                   lambda seat: (seat if seating.book_seat(seat)[0] else None),
+                                   before=lambda: rng.choice(available),
+                                   after=lambda seat: seat and seating.cancel_seat(seat))
+        results.append(summarize("book_seat", seats, fill, 1, samples, queries))
+    return results
+
+
+def bench_concurrent(seating, counter, seats, fill, threads, iterations, seed):
+    # Every worker books a random seat and cancels it again; bookings that hit
+    # an already-booked seat count as conflicts, not errors. A write that has
+    # to wait out the pool means some write path holds two connections.
+    samples = []
+    outcomes = {"booked": 0, "conflicts": 0, "errors": 0, "pool_timeouts": 0}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(threads)
+    start_waits = seating.db.busy_waits
+    start_lock_waits, start_lock_seconds = seating.db.lock_waits, seating.db.lock_wait_seconds
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        local_samples = []
+        local = {"booked": 0, "conflicts": 0, "errors": 0, "pool_timeouts": 0}
+        start_barrier.wait()
+        for _ in range(iterations):
+            seat = rng.choice(seating.seats)
+            start = time.perf_counter_ns()
+            try:
+                success, _ = seating.book_seat(seat)
+                local_samples.append(time.perf_counter_ns() - start)
+                if success:
+                    local["booked"] += 1
+                    seating.cancel_seat(seat)
+                else:
+                    local["conflicts"] += 1
+            except sqlite3.OperationalError:
+                local["errors"] += 1
+            except PoolTimeout:
+                local["pool_timeouts"] += 1
+        with lock:
+            samples.extend(local_samples)
+            for key, value in local.items():
+                outcomes[key] += value
+
+    start_queries = counter.count
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return summarize("book_seat[concurrent]", seats, fill, threads, samples, counter.count - start_queries,
+                     elapsed, busy_waits=seating.db.busy_waits - start_waits,
+                     lock_waits=seating.db.lock_waits - start_lock_waits,
+                     lock_wait_ms=(seating.db.lock_wait_seconds - start_lock_seconds) * 1000, **outcomes)
+
+
+def run_benchmarks(sizes, fills, thread_counts, iterations, seed=0, write_queue=False, log=print):
+    results = []
+    workdir = tempfile.mkdtemp(prefix="skyseats-bench-")
+    try:
+        for seats in sizes:
+            for fill in fills:
+                rng = random.Random(seed)
+                airline, seating = build_flight(workdir, seats, fill, rng)
+                counter = QueryCounter()
+                seating.db.set_trace(counter)
+                log(f"{seats} seats, {fill:.0%} full")
+                results.extend(bench_single(seating, counter, seats, fill, iterations, rng))
+                if write_queue:
+                    seating.writer = BookingWriter(seating.db)
+                for threads in thread_counts:
+                    results.append(bench_concurrent(seating, counter, seats, fill, threads, iterations, seed))
+                if seating.writer is not None:
+                    seating.writer.stop()
+                    seating.writer = None
+                seating.db.set_trace(None)
+                airline.db.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def result_key(result):
+    return result["op"], result["seats"], result["fill"], result["threads"]
+
+
+def compare(baseline, results, threshold):
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if not old or not old["p50_ms"]:
+            continue
+        change = result["p50_ms"] / old["p50_ms"] - 1
+        if change > threshold:
+            regressions.append((result_key(result), old["p50_ms"], result["p50_ms"], change))
+    return regressions
+
+
+def print_table(results):
+    print(f"{'op':<28}{'seats':>8}{'fill':>6}{'thr':>5}{'p50 ms':>10}{'p99 ms':>10}{'q/op':>8}{'ops/s':>11}")
+    for r in results:
+        print(f"{r['op']:<28}{r['seats']:>8}{r['fill']:>6.0%}{r['threads']:>5}{r['p50_ms']:>10.3f}"
+              f"{r['p99_ms']:>10.3f}{r['queries_per_op']:>8.1f}{r['ops_per_sec']:>11.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AirlineSeating operations on temporary databases.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="cabin sizes in seats")
+    parser.add_argument("--fills", type=float, nargs="+", default=DEFAULT_FILLS, help="booked fraction, 0 to 1")
+    parser.add_argument("--threads", type=int, nargs="+", default=DEFAULT_THREADS, help="concurrent writer threads")
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls per operation (per thread)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write-queue", action="store_true", help="send concurrent writes through a BookingWriter")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="p50 slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.fills, args.threads, args.iterations, args.seed, args.write_queue)
+    print_table(results)
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    starved = [result_key(result) for result in results if result.get("pool_timeouts")]
+    for key in starved:
+        print(f"POOL TIMEOUT {key}: writers ran out of pooled connections")
+    if args.compare:
+        with open(args.compare) as fp:
+            regressions = compare(json.load(fp), results, args.threshold)
+        for key, old, new, change in regressions:
+            print(f"REGRESSION {key}: p50 {old:.3f} ms -> {new:.3f} ms ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+    if starved:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
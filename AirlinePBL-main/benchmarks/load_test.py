@@ -0,0 +1,333 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_seating import percentile
+from skyseats.auth import LoginPage
+from skyseats.codes import GROUP_NAMES
+from skyseats.db import get_database
+from skyseats.flights import Airline
+from skyseats.layouts import LAYOUTS
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ACTIONS = ("book", "cancel", "auto", "bfs", "hold", "price", "waitlist")
+DEFAULT_MIX = "book=35,cancel=15,auto=15,bfs=10,hold=10,price=10,waitlist=5"
+DEFAULT_SESSIONS = (1, 4, 16, 64)
+
+# Radio labels of the main page, per action.
+PAGE_ACTIONS = {
+    "book": "Book a seat",
+    "cancel": "Cancel a seat",
+    "auto": "Auto-Assign with Preferences",
+    "bfs": "Find Adjacent Seats (BFS)",
+    "hold": "Hold a seat",
+    "price": "Check seat price",
+    "waitlist": "Join the waitlist",
+}
+
+
+def parse_mix(text):
+    mix = []
+    for part in text.split(","):
+        action, _, weight = part.partition("=")
+        if action.strip() not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action {action!r}, expected one of {', '.join(ACTIONS)}")
+        mix.append((action.strip(), float(weight or 1)))
+    return mix
+
+
+def new_outcomes():
+    return {action: {"ok": 0, "conflict": 0, "error": 0} for action in ACTIONS}
+
+
+class Recorder:
+    # Collects rerun latencies, per-action outcomes, lock waits and the wall
+    # clock span of every session.
+    def __init__(self):
+        self.samples = []
+        self.outcomes = new_outcomes()
+        self.lock_waits = 0
+        self.lock_wait_seconds = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add(self, result):
+        samples, outcomes, (lock_waits, lock_wait_seconds), started, finished = result
+        with self._lock:
+            self.samples.extend(samples)
+            for action, counts in outcomes.items():
+                for outcome, count in counts.items():
+                    self.outcomes[action][outcome] += count
+            self.lock_waits += lock_waits
+            self.lock_wait_seconds += lock_wait_seconds
+            self.started = started if self.started is None else min(self.started, started)
+            self.finished = finished if self.finished is None else max(self.finished, finished)
+
+
+def session_plan(mix, actions, seed):
+    rng = random.Random(seed)
+    return rng, rng.choices([action for action, _ in mix], [weight for _, weight in mix], k=actions)
+
+
+def render_main(fleet, flight_id, holder):
+    # The service calls main.py makes on every rerun, apart from the action.
+    fleet.list_flights()
+    airline = fleet.get_flight(flight_id)
+    airline.waitlist_status(holder)
+    airline.get_seating_html()
+    return airline
+
+
+def service_action(airline, action, holder, booked, rng):
+    # Returns True (done), False (refused: taken, held, full, ...) like the page would report it.
+    seat = rng.choice(airline.seats)
+    group = rng.choice(GROUP_NAMES)
+    if action == "book":
+        success, _ = airline.book_seat(seat, group, holder)
+        if success:
+            booked.append(seat)
+        return success
+    if action == "cancel":
+        seat = booked.pop(rng.randrange(len(booked))) if booked else seat
+        return airline.cancel_seat(seat)[0]
+    if action == "auto":
+        seat, _ = airline.auto_assign_best_seat(group)
+        if seat:
+            booked.append(seat)
+        return seat is not None
+    if action == "bfs":
+        return bool(airline.find_group_block(rng.randint(2, 4)))
+    if action == "hold":
+        return airline.hold_seat(seat, holder)[0]
+    if action == "price":
+        return airline.get_seat_status(seat, holder) == "Available" and airline.calculate_price(group, seat) > 0
+    return airline.join_waitlist(holder, group)[0]
+
+
+def service_session(fleet, login, flight_id, name, mix, actions, seed, think):
+    # One browser session against the shared in-process services, the way a
+    # Streamlit server runs every session on its own thread.
+    rng, plan = session_plan(mix, actions, seed)
+    samples = []
+    outcomes = new_outcomes()
+    booked = []
+    started = time.time()
+    start = time.perf_counter_ns()
+    login.add_user(name, "secret")
+    login.authenticate_user(name, "secret")
+    render_main(fleet, flight_id, name)
+    samples.append(time.perf_counter_ns() - start)
+    for action in plan:
+        start = time.perf_counter_ns()
+        try:
+            airline = fleet.get_flight(flight_id)
+            outcome = "ok" if service_action(airline, action, name, booked, rng) else "conflict"
+            render_main(fleet, flight_id, name)
+        except sqlite3.OperationalError:
+            outcome = "error"
+        samples.append(time.perf_counter_ns() - start)
+        outcomes[action][outcome] += 1
+        if think:
+            time.sleep(rng.expovariate(1 / think))
+    return samples, outcomes, (0, 0.0), started, time.time()
+
+
+def lock_waits(databases):
+    # Writes that queued for the write lock, and the seconds they spent there.
+    return sum(db.lock_waits for db in databases), sum(db.lock_wait_seconds for db in databases)
+
+
+def find_widget(widgets, label):
+    return next(widget for widget in widgets if widget.label.startswith(label))
+
+
+def timed_run(at, samples):
+    start = time.perf_counter_ns()
+    at.run()
+    samples.append(time.perf_counter_ns() - start)
+    return at
+
+
+def page_outcome(at):
+    if at.exception or at.error:
+        return "error"
+    return "ok" if at.success else "conflict"
+
+
+def apptest_session(workdir, flight_code, seats, name, mix, actions, seed, think):
+    # One browser session through the real pages. Runs in its own process:
+    # AppTest compiles the page scripts on every run and CPython's compiler
+    # is not safe to run from several threads at once.
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(workdir)
+    databases = get_database("airline.db"), get_database("users.db")
+    waits = lock_waits(databases)
+    rng, plan = session_plan(mix, actions, seed)
+    samples = []
+    outcomes = new_outcomes()
+    started = time.time()
+    at = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=120)
+    at.run()
+    at.sidebar.selectbox[0].set_value("Register")
+    timed_run(at, samples)
+    at.text_input[0].input(name)
+    at.text_input[1].input("secret")
+    at.button[0].click()
+    timed_run(at, samples)
+    at.sidebar.selectbox[0].set_value("Login")
+    timed_run(at, samples)
+    at.text_input[0].input(name)
+    at.text_input[1].input("secret")
+    at.button[0].click()
+    timed_run(at, samples)
+    # AppTest does not keep the page st.switch_page moved to, so the logged-in
+    # session continues on main.py directly.
+    user = at.session_state["user"]
+    at = AppTest.from_file(os.path.join(APP_DIR, "app_pages", "main.py"), default_timeout=120)
+    at.session_state["user"] = user
+    timed_run(at, samples)
+    find_widget(at.selectbox, "Flight").set_value(flight_code)
+    timed_run(at, samples)
+    for action in plan:
+        find_widget(at.radio, "Choose action").set_value(PAGE_ACTIONS[action])
+        timed_run(at, samples)
+        seat = rng.choice(seats)
+        find_widget(at.text_input, "Enter seat number").input("" if action in ("auto", "bfs", "waitlist") else seat)
+        if action in ("auto", "price", "waitlist"):
+            find_widget(at.selectbox, "Select passenger type").set_value(rng.choice(["None", *GROUP_NAMES[1:]]))
+        if action == "bfs":
+            find_widget(at.number_input, "Enter group size").set_value(rng.randint(2, 4))
+        find_widget(at.button, "Submit").click()
+        timed_run(at, samples)
+        outcomes[action][page_outcome(at)] += 1
+        if think:
+            time.sleep(rng.expovariate(1 / think))
+    count, seconds = lock_waits(databases)
+    return samples, outcomes, (count - waits[0], seconds - waits[1]), started, time.time()
+
+
+def run_level(mode, sessions, mix, actions, seed, think, flight_id, flight_code, fleet, login):
+    recorder = Recorder()
+    waits = lock_waits((fleet.db, login.db))
+    if mode == "service":
+        workers = [threading.Thread(target=lambda index=index: recorder.add(service_session(
+                       fleet, login, flight_id, f"load{sessions}_{index}", mix, actions, seed + index, think)))
+                   for index in range(sessions)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    else:
+        seats = fleet.get_flight(flight_id).seats
+        with ProcessPoolExecutor(sessions, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(apptest_session, os.getcwd(), flight_code, seats, f"load{sessions}_{index}", mix,
+                                   actions, seed + index, think)
+                       for index in range(sessions)]
+            for future in futures:
+                recorder.add(future.result())
+    elapsed = recorder.finished - recorder.started
+    count, seconds = lock_waits((fleet.db, login.db))
+    samples = sorted(recorder.samples)
+    writes = [recorder.outcomes[action] for action in ("book", "auto")]
+    attempts = sum(sum(counts.values()) for counts in writes)
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "reruns": len(samples),
+        "p50_ms": percentile(samples, 50) / 1e6,
+        "p90_ms": percentile(samples, 90) / 1e6,
+        "p99_ms": percentile(samples, 99) / 1e6,
+        "reruns_per_sec": len(samples) / elapsed if elapsed else 0.0,
+        "booking_success": sum(counts["ok"] for counts in writes) / attempts if attempts else 0.0,
+        "booking_conflict": sum(counts["conflict"] for counts in writes) / attempts if attempts else 0.0,
+        "errors": sum(counts["error"] for counts in recorder.outcomes.values()),
+        "lock_waits": count - waits[0] + recorder.lock_waits,
+        "lock_wait_ms": (seconds - waits[1] + recorder.lock_wait_seconds) * 1000,
+        "actions": recorder.outcomes,
+    }
+
+
+def run_load_test(mode, session_counts, mix, actions, layout, seed=0, think=0.0, write_queue=False, log=print):
+    # Every level gets a fresh flight in one temporary working directory; the
+    # app pages open airline.db and users.db relative to it, as in production.
+    workdir = tempfile.mkdtemp(prefix="skyseats-load-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    if write_queue:
+        os.environ["SKYSEATS_WRITE_QUEUE"] = "1"
+    os.environ.setdefault("SKYSEATS_REFRESH_SECONDS", "0")
+    results = []
+    try:
+        fleet = Airline(write_queue=write_queue)
+        login = LoginPage()
+        login.create_users_table()
+        for sessions in session_counts:
+            flight_code = f"LOAD{sessions}"
+            flight_id, _ = fleet.create_flight(flight_code, layout=layout)
+            log(f"{mode}: {sessions} sessions on {flight_code} ({layout})")
+            results.append(run_level(mode, sessions, mix, actions, seed, think, flight_id, flight_code, fleet, login))
+        for flight_id, _ in fleet.list_flights():
+            fleet.get_flight(flight_id).holds.flush()  # pending timers then find nothing left to write
+        fleet.db.close()
+        login.db.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def print_table(results):
+    print(f"{'mode':<9}{'sess':>6}{'reruns':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'rr/s':>8}"
+          f"{'booked':>8}{'confl':>7}{'errors':>7}{'waits':>7}{'wait ms':>9}")
+    for r in results:
+        print(f"{r['mode']:<9}{r['sessions']:>6}{r['reruns']:>8}{r['p50_ms']:>9.2f}{r['p90_ms']:>9.2f}"
+              f"{r['p99_ms']:>9.2f}{r['reruns_per_sec']:>8.0f}{r['booking_success']:>8.0%}"
+              f"{r['booking_conflict']:>7.0%}{r['errors']:>7}{r['lock_waits']:>7}{r['lock_wait_ms']:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive many simulated booking sessions against a temporary database.")
+    parser.add_argument("--mode", choices=("service", "apptest"), default="service",
+                        help="call the service layer directly, or run the Streamlit pages headlessly")
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS, help="concurrent sessions")
+    parser.add_argument("--actions", type=int, default=50, help="actions per session")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"action weights, default {DEFAULT_MIX}")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="A320", help="aircraft layout of the test flight")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between actions, in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write-queue", action="store_true", help="send writes through a BookingWriter")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = run_load_test(args.mode, args.sessions, args.mix, args.actions, args.layout, args.seed, args.think,
+                            args.write_queue)
+    print_table(results)
+    if args.output:
+        report = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "args": {**vars(args), "mix": dict(args.mix)},
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
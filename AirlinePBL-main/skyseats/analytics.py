@@ -0,0 +1,39 @@
+from skyseats.codes import BOOKED, GROUP_NAMES, SEAT_COL_BITS
+from skyseats.metrics import instrumented
+
+# Every query below is an aggregate over seats answered from the covering
+# index idx_seats_flight_status_group; none of them reads seats one by one.
+
+
+@instrumented
+def fleet_summary(db):
+    # One row per flight: seats, booked, load factor and revenue so far.
+    rows = db.fetchall(f'''SELECT flights.flight_id, flights.code, totals.seats, totals.booked, totals.revenue
+                           FROM flights JOIN (SELECT flight_id, count(*) AS seats,
+                                                     sum(status = {BOOKED}) AS booked, total(fare) AS revenue
+                                              FROM seats GROUP BY flight_id) AS totals
+                                        ON totals.flight_id = flights.flight_id
+                           ORDER BY flights.code''')
+    return [{"flight_id": flight_id, "code": code, "seats": seats, "booked": booked,
+             "load_factor": booked / seats if seats else 0.0, "revenue": revenue}
+            for flight_id, code, seats, booked, revenue in rows]
+
+
+@instrumented
+def bookings_by_group(db, flight_id=None):
+    # {special_group: (bookings, revenue)} for one flight, or the whole fleet.
+    where = "status = ?" + (" AND flight_id = ?" if flight_id is not None else "")
+    params = (BOOKED,) if flight_id is None else (BOOKED, flight_id)
+    rows = db.fetchall(f"SELECT group_code, count(*), total(fare) FROM seats WHERE {where} GROUP BY group_code",
+                       params)
+    totals = {name: (0, 0.0) for name in GROUP_NAMES}
+    totals.update({GROUP_NAMES[group_code]: (count, revenue) for group_code, count, revenue in rows})
+    return totals
+
+
+@instrumented
+def row_fill(db, flight_id):
+    # [(row number, seats, booked)] in cabin order.
+    rows = db.fetchall(f"SELECT seat_id >> {SEAT_COL_BITS} AS row, count(*), sum(status = {BOOKED}) FROM seats "
+                       "WHERE flight_id = ? GROUP BY row ORDER BY row", (flight_id,))
+    return [(row + 1, seats, booked) for row, seats, booked in rows]
@@ -0,0 +1,42 @@
+import sqlite3
+import hashlib
+import threading
+
+from skyseats.db import get_database
+from skyseats.metrics import instrumented
+
+
+_initialized = set()
+_initialized_lock = threading.Lock()
+
+
+class LoginPage:
+    def __init__(self, db_path="users.db"):
+        self.db_path = db_path
+        self.db = get_database(db_path)
+
+    @instrumented
+    def create_users_table(self):
+        with _initialized_lock:
+            if self.db.db_path in _initialized:
+                return
+            self.db.execute('''CREATE TABLE IF NOT EXISTS users (
+                               username TEXT PRIMARY KEY,
+                               password TEXT)''')
+            _initialized.add(self.db.db_path)
+
+    @instrumented
+    def add_user(self, username, password):
+        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        try:
+            self.db.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, hashed_password))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    @instrumented
+    def authenticate_user(self, username, password):
+        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        result = self.db.fetchone("SELECT 1 FROM users WHERE username = ? AND password = ?",
+                                  (username, hashed_password))
+        return result is not None
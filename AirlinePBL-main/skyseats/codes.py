@@ -0,0 +1,20 @@
+AVAILABLE = 0
+BOOKED = 1
+HELD = 2  # never stored in seats, holds live in skyseats.holds and seat_holds
+INVALID = 255  # never stored, marks positions missing from the seats table
+
+STATUS_NAMES = {AVAILABLE: "Available", BOOKED: "Booked", HELD: "Held", INVALID: "Invalid"}
+STATUS_CODES = {name: code for code, name in STATUS_NAMES.items()}
+
+GROUP_NAMES = (None, "Elderly", "Disabled", "Infant", "Silent")
+GROUP_CODES = {name: code for code, name in enumerate(GROUP_NAMES)}
+
+# Seat ids pack the zero-based row and column into one integer, so the
+# (flight_id, seat_id) primary key sorts seats in row-major order.
+SEAT_COL_BITS = 4
+SEAT_COL_MASK = (1 << SEAT_COL_BITS) - 1
+MAX_SEAT_COLS = 1 << SEAT_COL_BITS  # seats per row a seat id can tell apart
+
+
+def pack_seat_id(row, col):
+    return row << SEAT_COL_BITS | col
@@ -0,0 +1,241 @@
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",  # safe with WAL, one fsync per checkpoint instead of per commit
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",  # 8 MB page cache per connection
+    "PRAGMA busy_timeout = 5000",
+)
+LOCK_WAIT_THRESHOLD = 0.001  # seconds; a BEGIN IMMEDIATE slower than this waited for another writer
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+def is_busy_error(error):
+    message = str(error)
+    return "locked" in message or "busy" in message
+
+
+class Database:
+    def __init__(self, db_path, pool_size=8, cached_statements=256, busy_retries=5, busy_backoff=0.02,
+                 acquire_timeout=30.0):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.acquire_timeout = acquire_timeout  # seconds to wait for a free connection before giving up
+        self.cached_statements = cached_statements
+        self.busy_retries = busy_retries
+        self.busy_backoff = busy_backoff
+        self.busy_waits = 0
+        self.lock_waits = 0  # BEGIN IMMEDIATEs that waited for the write lock
+        self.lock_wait_seconds = 0.0  # time those spent waiting
+        self.trace = None
+        self.count_rows = None  # count_rows(n) receives rows changed or fetched, when instrumented
+        self._traces = {}  # id(connection) -> trace callback installed on it
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._held = threading.local()  # connections checked out by the current thread
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+
+    def create_connection(self):
+        # isolation_level=None puts the connection in autocommit mode so that
+        # transactions are only ever opened explicitly through transaction().
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                               cached_statements=self.cached_statements)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return self.traced(conn)
+
+    def set_trace(self, callback):
+        # callback(sql) is called for every statement run on a pooled
+        # connection; None switches tracing off. Connections that are checked
+        # out pick it up when they are next acquired.
+        self.trace = callback
+
+    def acquire(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.pool_size
+                if create:
+                    self._created += 1
+            conn = self.create_connection() if create else self.wait_for_connection()
+        self._held.count = getattr(self._held, "count", 0) + 1
+        return self.traced(conn)
+
+    def wait_for_connection(self):
+        try:
+            return self._pool.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            pass
+        held = getattr(self._held, "count", 0)
+        if held:
+            # Waiting while holding a connection is how a full pool deadlocks.
+            raise PoolTimeout(f"No free connection after {self.acquire_timeout:g}s; this thread already "
+                              f"holds {held}, so it is likely asking for a second one inside a write.")
+        raise PoolTimeout(f"No free connection after {self.acquire_timeout:g}s "
+                          f"(pool of {self.pool_size}).")
+
+    def traced(self, conn):
+        if self._traces.get(id(conn)) is not self.trace:
+            conn.set_trace_callback(self.trace)
+            self._traces[id(conn)] = self.trace
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._held.count -= 1
+        self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        count_rows = self.count_rows
+        changes = conn.total_changes if count_rows else 0
+        try:
+            yield conn
+        finally:
+            if count_rows:
+                count_rows(conn.total_changes - changes)
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        with self.connection() as conn:
+            if immediate:
+                self.begin_immediate(conn)
+            else:
+                conn.execute("BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.execute("COMMIT")
+
+    def begin_immediate(self, conn):
+        # busy_timeout waits for the write lock inside this statement, so its
+        # duration is the time spent queued behind other writers.
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        finally:
+            waited = time.perf_counter() - start
+            if waited > LOCK_WAIT_THRESHOLD:
+                with self._lock:
+                    self.lock_waits += 1
+                    self.lock_wait_seconds += waited
+
+    def retry(self, fn):
+        # busy_timeout already waits inside SQLite; this covers the cases it
+        # gives up on (e.g. a long checkpoint) with jittered exponential backoff.
+        delay = self.busy_backoff
+        for _ in range(self.busy_retries):
+            try:
+                return fn()
+            except sqlite3.OperationalError as error:
+                if not is_busy_error(error):
+                    raise
+                self.busy_waits += 1
+            time.sleep(delay * (1 + random.random()))
+            delay *= 2
+        return fn()
+
+    def write(self, fn):
+        # BEGIN IMMEDIATE takes the write lock up front, so a transaction never
+        # has to upgrade a read lock and cannot deadlock with another writer.
+        def run():
+            with self.transaction(immediate=True) as conn:
+                return fn(conn)
+        return self.retry(run)
+
+    def run(self, fn):
+        # Runs fn on a pooled connection in autocommit mode, where every
+        # statement is its own atomic transaction.
+        def run():
+            with self.connection() as conn:
+                return fn(conn)
+        return self.retry(run)
+
+    def execute(self, sql, params=()):
+        return self.run(lambda conn: conn.execute(sql, params).rowcount)
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        return self.write(lambda conn: conn.executemany(sql, seq_of_params).rowcount)
+
+    def fetchone(self, sql, params=()):
+        with self.connection() as conn:
+            row = conn.execute(sql, params).fetchone()
+        if self.count_rows and row is not None:
+            self.count_rows(1)
+        return row
+
+    def fetchall(self, sql, params=()):
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        if self.count_rows:
+            self.count_rows(len(rows))
+        return rows
+
+    def data_version(self):
+        # PRAGMA data_version only changes when *another* connection commits,
+        # so it is read from a dedicated connection that never writes. Every
+        # commit made through the pool, or by another process, bumps it.
+        with self._watcher_lock:
+            if self._watcher is None:
+                self._watcher = self.create_connection()
+            return self.traced(self._watcher).execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            self._traces.pop(id(conn), None)
+            conn.close()
+            with self._lock:
+                self._created -= 1
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+_instrumentation = (None, None)
+
+
+def get_database(db_path):
+    key = os.path.abspath(db_path)
+    with _databases_lock:
+        db = _databases.get(key)
+        if db is None:
+            db = _databases[key] = Database(key)
+            db.set_trace(_instrumentation[0])
+            db.count_rows = _instrumentation[1]
+        return db
+
+
+def set_trace_all(trace, count_rows=None):
+    # Instruments every shared database, including ones opened later.
+    global _instrumentation
+    with _databases_lock:
+        _instrumentation = (trace, count_rows)
+        for db in _databases.values():
+            db.set_trace(trace)
+            db.count_rows = count_rows
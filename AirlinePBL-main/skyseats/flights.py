@@ -0,0 +1,60 @@
+import sqlite3
+import threading
+
+from skyseats.db import get_database
+from skyseats.layouts import LAYOUTS, get_layout, seat_labels_error
+from skyseats.metrics import instrumented
+from skyseats.schema import ensure_schema, insert_flight
+from skyseats.seating import AirlineSeating
+from skyseats.writer import get_writer
+
+
+class Airline:
+    def __init__(self, db_path="airline.db", write_queue=False):
+        self.db_path = db_path
+        self.db = get_database(db_path)
+        ensure_schema(self.db)
+        self.writer = get_writer(self.db) if write_queue else None
+        self._flights = {}  # flight_id -> AirlineSeating, created on first access
+        self._lock = threading.Lock()
+
+    @instrumented
+    def list_flights(self):
+        return self.db.fetchall("SELECT flight_id, code FROM flights ORDER BY code")
+
+    def find_flight_id(self, code):
+        result = self.db.fetchone("SELECT flight_id FROM flights WHERE code = ?", (code,))
+        return result[0] if result else None
+
+    @instrumented
+    def create_flight(self, code, rows=10, seat_labels="ABCDEF", aisles=(3,), layout=None):
+        # A named layout from skyseats.layouts decides rows, letters and aisles.
+        if layout is not None:
+            if layout not in LAYOUTS:
+                return None, f"Unknown aircraft layout: {layout}"
+            rows, seat_labels, aisles = LAYOUTS[layout].rows, LAYOUTS[layout].seat_labels, LAYOUTS[layout].aisles
+        error = seat_labels_error(seat_labels)
+        if error:
+            return None, error
+        try:
+            flight_id = self.db.write(lambda conn: insert_flight(conn, code, rows, seat_labels, aisles, layout))
+        except sqlite3.IntegrityError:
+            return None, f"Flight {code} already exists."
+        return flight_id, f"Flight {code} created with {rows * len(seat_labels)} seats."
+
+    @instrumented
+    def get_flight(self, flight_id):
+        with self._lock:
+            seating = self._flights.get(flight_id)
+        if seating is not None:
+            return seating
+        result = self.db.fetchone("SELECT rows, seat_labels, aisles, layout FROM flights WHERE flight_id = ?",
+                                  (flight_id,))
+        if result is None:
+            return None
+        rows, seat_labels, aisles, layout = result
+        layout = get_layout(layout, rows, seat_labels, tuple(int(aisle) for aisle in aisles.split(",") if aisle))
+        seating = AirlineSeating(self.db_path, flight_id, layout)
+        seating.writer = self.writer
+        with self._lock:
+            return self._flights.setdefault(flight_id, seating)
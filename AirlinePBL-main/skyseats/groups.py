@@ -0,0 +1,225 @@
+import heapq
+from collections import namedtuple
+
+# seats is a tuple of (row, col) pairs. Blocks rank by how many rows they span,
+# then whether they straddle an aisle, then how many free seats they leave
+# stranded in the run they came from, then how far back they sit.
+Block = namedtuple("Block", "seats rows across_aisle waste")
+
+
+def block_rank(block):
+    return block.rows, block.across_aisle, block.waste, block.seats[0][0]
+
+
+def section_bounds(cols, aisles):
+    edges = [0, *aisles, cols]
+    return [(edges[i], edges[i + 1]) for i in range(len(edges) - 1)]
+
+
+class GroupSeatingEngine:
+    def __init__(self, occupancy, aisles):
+        self.occupancy = occupancy
+        self.aisles = tuple(aisles)
+        self.sections = section_bounds(occupancy.cols, self.aisles)
+        self.max_length = max(hi - lo for lo, hi in self.sections)
+        # Widest party one row can seat, counting blocks across an aisle.
+        self.max_row_block = max([self.max_length] + [b_hi - a_lo for (a_lo, _), (_, b_hi)
+                                                      in zip(self.sections, self.sections[1:])])
+        self.row_runs = [()] * occupancy.rows  # maximal free runs (start, length) per row, per section
+        self.buckets = [[] for _ in range(self.max_length + 1)]  # run length -> heap of (row, start)
+        # Free seats either side of each aisle: (edge, left, right) per row, and
+        # left + right -> heap of (row, edge, left, right), kept like the runs.
+        self.row_spans = [()] * occupancy.rows
+        self.span_buckets = [[] for _ in range(self.max_row_block + 1)]
+        for row in range(occupancy.rows):
+            self.update_row(row)
+
+    def update_row(self, row):
+        mask = self.occupancy.free[row]
+        runs = []
+        for lo, hi in self.sections:
+            col = lo
+            while col < hi:
+                if mask >> col & 1:
+                    start = col
+                    while col < hi and mask >> col & 1:
+                        col += 1
+                    runs.append((start, col - start))
+                else:
+                    col += 1
+        old_runs = self.row_runs[row]
+        self.row_runs[row] = tuple(runs)
+        # Stale heap entries are dropped lazily when they surface in best_run().
+        for start, length in runs:
+            if (start, length) not in old_runs:
+                heapq.heappush(self.buckets[length], (row, start))
+        spans = []
+        for edge in self.aisles:
+            left = next((length for start, length in runs if start + length == edge), 0)
+            right = next((length for start, length in runs if start == edge), 0)
+            if left and right:
+                spans.append((edge, left, right))
+        old_spans = self.row_spans[row]
+        self.row_spans[row] = tuple(spans)
+        for edge, left, right in spans:
+            if (edge, left, right) not in old_spans:
+                heapq.heappush(self.span_buckets[left + right], (row, edge, left, right))
+
+    def best_run(self, size, length=None):
+        lengths = range(size, self.max_length + 1) if length is None else (length,)
+        for length in lengths:
+            heap = self.buckets[length]
+            while heap:
+                row, start = heap[0]
+                if (start, length) in self.row_runs[row]:
+                    return row, start, length
+                heapq.heappop(heap)
+        return None
+
+    def run_candidates(self, size):
+        for length in range(size, self.max_length + 1):
+            run = self.best_run(size, length)
+            if run is not None:
+                row, start, length = run
+                seats = tuple((row, col) for col in range(start, start + size))
+                yield Block(seats, 1, False, length - size)
+
+    def best_span(self, total):
+        heap = self.span_buckets[total]
+        while heap:
+            row, edge, left, right = heap[0]
+            if (edge, left, right) in self.row_spans[row]:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def aisle_candidates(self, size):
+        # The front-most span of each total width that fits.
+        for total in range(size, self.max_row_block + 1):
+            span = self.best_span(total)
+            if span is not None:
+                row, edge, left, right = span
+                take_right = min(right, size - min(left, (size + 1) // 2))
+                take_left = size - take_right
+                seats = tuple((row, col) for col in range(edge - take_left, edge + take_right))
+                yield Block(seats, 1, True, left + right - size)
+
+    def split_candidate(self, size):
+        # Shortest window of consecutive rows holding enough free seats,
+        # found with two pointers over per-row free counts.
+        counts = [mask.bit_count() for mask in self.occupancy.free]
+        best = None
+        total = 0
+        first = 0
+        for last, count in enumerate(counts):
+            total += count
+            while total - counts[first] >= size:
+                total -= counts[first]
+                first += 1
+            if total >= size and (best is None or last - first < best[1] - best[0]):
+                best = (first, last)
+        if best is None:
+            return None
+        seats = []
+        for row in range(best[0], best[1] + 1):
+            mask = self.occupancy.free[row]
+            seats.extend((row, col) for col in range(self.occupancy.cols) if mask >> col & 1)
+        return Block(tuple(seats[:size]), best[1] - best[0] + 1, False, len(seats) - size)
+
+    def candidates(self, size, allow_split=True, limit=5):
+        if size < 1:
+            return []
+        found = list(self.run_candidates(size)) if size <= self.max_length else []
+        if len(found) < limit:
+            found.extend(self.aisle_candidates(size))
+        if not found and allow_split:
+            block = self.split_candidate(size)
+            if block is not None:
+                found.append(block)
+        found.sort(key=block_rank)
+        return found[:limit]
+
+    def best_block(self, size, allow_split=True):
+        found = self.candidates(size, allow_split, limit=1)
+        return found[0] if found else None
+
+    def reserve(self, block):
+        rows = set()
+        for row, col in block.seats:
+            self.occupancy.mark_booked(row, col)
+            rows.add(row)
+        for row in rows:
+            self.update_row(row)
+
+    def place(self, sizes, allow_split=True):
+        placed = []
+        for size in sizes:
+            block = self.best_block(size, allow_split)
+            if block is not None:
+                self.reserve(block)
+            placed.append(block)
+        return placed
+
+
+def min_rows(engine, size):
+    return -(-size // engine.occupancy.cols)
+
+
+def place_together(engine, size):
+    # A party too big for one row's block sits together when it spans the
+    # fewest rows it possibly can.
+    if size <= engine.max_row_block:
+        return engine.best_block(size, allow_split=False)
+    block = engine.best_block(size)
+    return block if block is not None and block.rows <= min_rows(engine, size) else None
+
+
+def try_place(occupancy, aisles, sizes):
+    # Best-fit decreasing: largest parties first, each into the smallest free
+    # run that holds it. Returns the engine and {index: block}, or None as
+    # soon as one party cannot sit together.
+    engine = GroupSeatingEngine(occupancy.copy(), aisles)
+    placed = {}
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        block = place_together(engine, sizes[i])
+        if block is None:
+            return None
+        engine.reserve(block)
+        placed[i] = block
+    return engine, placed
+
+
+def plan_parties(occupancy, aisles, sizes, allow_split=True):
+    # Seats as many parties together as possible: the smallest parties are
+    # the cheapest to keep together, so binary search the largest k for which
+    # the k smallest all fit, packed best-fit decreasing. The larger parties
+    # then take what they can of the leftover runs, and with allow_split the
+    # rest are spread over the fewest rows. Equal sizes keep their order in
+    # sizes. Returns (block or None, together) per party, in the order given.
+    order = sorted((i for i in range(len(sizes)) if sizes[i] > 0), key=lambda i: sizes[i])
+    low, high = 0, len(order)
+    best = GroupSeatingEngine(occupancy.copy(), aisles), {}
+    while low < high:
+        k = (low + high + 1) // 2
+        result = try_place(occupancy, aisles, [sizes[i] for i in order[:k]])
+        if result is None:
+            high = k - 1
+        else:
+            low, best = k, result
+    engine, placed = best
+    plan = [(None, False)] * len(sizes)
+    for i, block in placed.items():
+        plan[order[i]] = block, True
+    rest = sorted(order[low:], key=lambda i: -sizes[i])
+    for i in rest:
+        block = place_together(engine, sizes[i])
+        if block is not None:
+            engine.reserve(block)
+            plan[i] = block, True
+    if allow_split:
+        for i in rest:
+            block = None if plan[i][0] else engine.best_block(sizes[i])
+            if block is not None:
+                engine.reserve(block)
+                plan[i] = block, False
+    return plan
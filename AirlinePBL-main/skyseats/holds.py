@@ -0,0 +1,129 @@
+import heapq
+import threading
+import time
+
+DEFAULT_HOLD_TTL = 300.0  # seconds a seat stays held during checkout
+FLUSH_INTERVAL = 2.0  # seconds hold changes may wait before they are written
+
+
+class HoldTable:
+    # In-memory seat holds for one cabin. Expiry is driven by a min-heap of
+    # (expires_at, position, holder): every access pops only the entries that
+    # are due, and entries superseded by a later hold or release are skipped
+    # when they surface (lazy deletion). held_rows mirrors the holds as one
+    # bitmask per row so they can be masked out of an OccupancyIndex.
+    # Changes are collected and handed to flush() in the background, so the
+    # hold path itself never waits for the database.
+    def __init__(self, cols, ttl=DEFAULT_HOLD_TTL, flush=None, flush_interval=FLUSH_INTERVAL):
+        self.cols = cols
+        self.ttl = ttl
+        self.flush_callback = flush  # called with {position: (expires_at, holder) or None}
+        self.flush_interval = flush_interval
+        self.holds = {}  # position -> (expires_at, holder)
+        self.held_rows = {}  # row -> bitmask of held columns
+        self.version = 0  # bumped on every change, used as a cache key
+        self._heap = []
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.RLock()
+
+    def expire(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                expires_at, pos, holder = heapq.heappop(heap)
+                if self.holds.get(pos) == (expires_at, holder):
+                    self._remove(pos)
+
+    def hold(self, pos, holder, ttl=None, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self.expire(now)
+            current = self.holds.get(pos)
+            if current is not None and current[1] != holder:
+                return False
+            self._add(pos, now + (ttl or self.ttl), holder)
+            self._changed(pos)
+            return True
+
+    def release(self, pos, holder=None):
+        with self._lock:
+            self.expire()
+            current = self.holds.get(pos)
+            if current is None or (holder is not None and current[1] != holder):
+                return False
+            self._remove(pos)
+            return True
+
+    def holder_of(self, pos):
+        self.expire()
+        entry = self.holds.get(pos)
+        return entry[1] if entry else None
+
+    def expires_at(self, pos):
+        self.expire()
+        entry = self.holds.get(pos)
+        return entry[0] if entry else None
+
+    def snapshot(self):
+        # (version, holds, held_rows) copied under the lock, for building
+        # cached views that must not change underneath their builder.
+        self.expire()
+        with self._lock:
+            return self.version, dict(self.holds), dict(self.held_rows)
+
+    def load(self, entries, now=None):
+        # entries are (position, expires_at, holder) rows read back from storage.
+        now = time.time() if now is None else now
+        with self._lock:
+            for pos, expires_at, holder in entries:
+                if expires_at > now:
+                    self._add(pos, expires_at, holder)
+                else:
+                    self._changed(pos)  # expired while nobody was running; drop the stored row
+
+    def _add(self, pos, expires_at, holder):
+        self.holds[pos] = (expires_at, holder)
+        heapq.heappush(self._heap, (expires_at, pos, holder))
+        row, col = divmod(pos, self.cols)
+        self.held_rows[row] = self.held_rows.get(row, 0) | 1 << col
+        self.version += 1
+
+    def _remove(self, pos):
+        del self.holds[pos]
+        row, col = divmod(pos, self.cols)
+        mask = self.held_rows[row] & ~(1 << col)
+        if mask:
+            self.held_rows[row] = mask
+        else:
+            del self.held_rows[row]
+        self.version += 1
+        self._changed(pos)
+
+    def _changed(self, pos):
+        self._pending[pos] = self.holds.get(pos)
+        if self.flush_callback is not None:
+            self._schedule_flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+        if not pending or self.flush_callback is None:
+            return
+        try:
+            self.flush_callback(pending)
+        except Exception:
+            # Keep the changes for the next attempt unless newer ones replaced them.
+            with self._lock:
+                for pos, entry in pending.items():
+                    self._pending.setdefault(pos, entry)
+                self._schedule_flush()
+            raise
+
+    def _schedule_flush(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
@@ -0,0 +1,67 @@
+from skyseats.codes import AVAILABLE, INVALID, SEAT_COL_BITS, SEAT_COL_MASK
+
+SNAPSHOT_INTERVAL = 1000  # journal entries per flight between snapshots
+
+
+def positions(seat_ids, cols):
+    return ((seat_id >> SEAT_COL_BITS) * cols + (seat_id & SEAT_COL_MASK) for seat_id in seat_ids)
+
+
+def latest_seq(conn, flight_id):
+    return conn.execute("SELECT coalesce(max(seq), 0) FROM seat_journal WHERE flight_id = ?",
+                        (flight_id,)).fetchone()[0]
+
+
+def changes_since(conn, flight_id, seq, limit=-1):
+    # [(seq, seat_id, status, group_code)] for the changes after seq, oldest
+    # first; at most limit of them unless limit is negative.
+    return conn.execute("SELECT seq, seat_id, status, group_code FROM seat_journal "
+                        "WHERE flight_id = ? AND seq > ? ORDER BY seq LIMIT ?", (flight_id, seq, limit)).fetchall()
+
+
+def apply_changes(status, groups, changes, cols):
+    seat_ids = [change[1] for change in changes]
+    for pos, (_, _, seat_status, group_code) in zip(positions(seat_ids, cols), changes):
+        status[pos] = seat_status
+        groups[pos] = group_code
+
+
+def write_snapshot(conn, flight_id, cols, size):
+    # Copies the flight's current seats into one compact row: a status byte
+    # and a group byte per seat position, tagged with the journal seq they
+    # include. Runs inside the caller's write transaction.
+    status = bytearray([INVALID]) * size
+    groups = bytearray(size)
+    rows = conn.execute("SELECT seat_id, status, group_code FROM seats WHERE flight_id = ?", (flight_id,)).fetchall()
+    for pos, (_, seat_status, group_code) in zip(positions([row[0] for row in rows], cols), rows):
+        status[pos] = seat_status
+        groups[pos] = group_code
+    seq = latest_seq(conn, flight_id)
+    conn.execute("INSERT OR REPLACE INTO seat_snapshots (flight_id, seq, status, groups) VALUES (?, ?, ?, ?)",
+                 (flight_id, seq, bytes(status), bytes(groups)))
+    return seq
+
+
+def snapshot_if_due(conn, flight_id, cols, size, interval=SNAPSHOT_INTERVAL):
+    last = conn.execute("SELECT coalesce(max(seq), 0) FROM seat_snapshots WHERE flight_id = ?",
+                        (flight_id,)).fetchone()[0]
+    pending = conn.execute("SELECT count(*) FROM (SELECT 1 FROM seat_journal WHERE flight_id = ? AND seq > ? LIMIT ?)",
+                           (flight_id, last, interval)).fetchone()[0]
+    return write_snapshot(conn, flight_id, cols, size) if pending >= interval else None
+
+
+def replay(conn, flight_id, cols, size, seq=None):
+    # Rebuilds (seq, status, groups) at journal position seq (default: the
+    # latest) from the newest snapshot at or before it plus the journal after
+    # it. Flights without a snapshot start from an all-available cabin.
+    seq = latest_seq(conn, flight_id) if seq is None else seq
+    snapshot = conn.execute("SELECT seq, status, groups FROM seat_snapshots WHERE flight_id = ? AND seq <= ? "
+                            "ORDER BY seq DESC LIMIT 1", (flight_id, seq)).fetchone()
+    if snapshot is None:
+        base, status, groups = 0, bytearray([AVAILABLE]) * size, bytearray(size)
+    else:
+        base, status, groups = snapshot[0], bytearray(snapshot[1]), bytearray(snapshot[2])
+    changes = conn.execute("SELECT seq, seat_id, status, group_code FROM seat_journal "
+                           "WHERE flight_id = ? AND seq > ? AND seq <= ? ORDER BY seq", (flight_id, base, seq)).fetchall()
+    apply_changes(status, groups, changes, cols)
+    return seq, status, groups
@@ -0,0 +1,94 @@
+from collections import namedtuple
+from functools import lru_cache
+from itertools import accumulate
+
+from skyseats.codes import MAX_SEAT_COLS, pack_seat_id
+
+Cabin = namedtuple("Cabin", "name first_row last_row")  # rows counted from 1, inclusive
+
+AISLE = -1  # marks an aisle in a display row; display rows that are None are row gaps
+
+
+def seat_labels_error(seat_labels):
+    # Why a row of seat letters cannot be laid out, or None when it can.
+    if len(seat_labels) > MAX_SEAT_COLS:
+        return f"A row can have at most {MAX_SEAT_COLS} seats, not {len(seat_labels)}."
+    if len(set(seat_labels)) != len(seat_labels):
+        return f"Seat letters must not repeat: {seat_labels}"
+    return None
+
+
+class AircraftLayout:
+    # A cabin described declaratively and compiled once into lookup tables
+    # indexed by seat position (row-major, from 0). blocks are the seat
+    # letters between aisles, left to right, e.g. ("ABC", "DEF").
+    def __init__(self, name, rows, blocks, exit_rows=(), cabins=(), row_gaps=()):
+        self.name = name
+        self.rows = rows
+        self.blocks = tuple(blocks)
+        self.exit_rows = frozenset(exit_rows)
+        self.cabins = tuple(Cabin(*cabin) for cabin in cabins) or (Cabin("Economy", 1, rows),)
+        self.row_gaps = frozenset(row_gaps)  # rows followed by a gap on the seat map
+        self.seat_labels = "".join(self.blocks)
+        error = seat_labels_error(self.seat_labels)
+        if error:
+            raise ValueError(error)
+        self.cols = len(self.seat_labels)
+        self.aisles = tuple(accumulate(len(block) for block in self.blocks[:-1]))  # columns with an aisle on their left
+
+        positions = range(rows * self.cols)
+        self.coords = tuple(divmod(pos, self.cols) for pos in positions)
+        self.seats = tuple(f"{row + 1}{self.seat_labels[col]}" for row, col in self.coords)
+        self.seat_index = {seat: pos for pos, seat in enumerate(self.seats)}
+        self.seat_ids = tuple(pack_seat_id(row, col) for row, col in self.coords)
+
+        edges = (0, *self.aisles, self.cols)
+        self.block_of_col = tuple(next(i for i in range(len(self.blocks)) if col < edges[i + 1])
+                                  for col in range(self.cols))
+        # Seats beside each other in the same block (no aisle in between).
+        self.neighbors = tuple(
+            tuple(row * self.cols + other for other in (col - 1, col + 1)
+                  if 0 <= other < self.cols and self.block_of_col[other] == self.block_of_col[col])
+            for row, col in self.coords)
+
+        display = []
+        for row in range(rows):
+            cells = []
+            for col in range(self.cols):
+                if col in self.aisles:
+                    cells.append(AISLE)
+                cells.append(row * self.cols + col)
+            display.append(tuple(cells))
+            if row + 1 in self.row_gaps and row + 1 < rows:
+                display.append(None)
+        self.display = tuple(display)
+
+    def is_exit_row(self, row):
+        return row + 1 in self.exit_rows
+
+
+LAYOUTS = {layout.name: layout for layout in (
+    AircraftLayout("A320-60", 10, ("ABC", "DEF"), exit_rows=(6,),
+                   cabins=(("Business", 1, 3), ("Economy", 4, 10)), row_gaps=(5,)),
+    AircraftLayout("A320", 30, ("ABC", "DEF"), exit_rows=(12, 13),
+                   cabins=(("Business", 1, 3), ("Economy", 4, 30)), row_gaps=(3, 11)),
+    AircraftLayout("B777", 40, ("ABC", "DEFG", "HJK"), exit_rows=(7, 25),
+                   cabins=(("Business", 1, 6), ("Economy", 7, 40)), row_gaps=(6, 24)),
+)}
+
+DEFAULT_LAYOUT = LAYOUTS["A320-60"]
+
+
+@lru_cache(maxsize=None)
+def custom_layout(rows, seat_labels, aisles):
+    # Layout for a flight created from a plain row count and seat letters.
+    edges = (0, *aisles, len(seat_labels))
+    blocks = [seat_labels[edges[i]:edges[i + 1]] for i in range(len(edges) - 1)]
+    return AircraftLayout("Custom", rows, [block for block in blocks if block])
+
+
+def get_layout(name, rows, seat_labels, aisles):
+    layout = LAYOUTS.get(name)
+    if layout is not None and (layout.rows, layout.seat_labels, layout.aisles) == (rows, seat_labels, aisles):
+        return layout
+    return custom_layout(rows, seat_labels, tuple(aisles))
@@ -0,0 +1,81 @@
+import csv
+import json
+from itertools import islice
+
+from skyseats.codes import BOOKED, GROUP_CODES, GROUP_NAMES, STATUS_NAMES
+
+MANIFEST_FIELDS = ("seat", "status", "special_group")
+
+
+def manifest_format(filename):
+    return "jsonl" if filename.lower().endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+def read_manifest(fp, fmt="csv"):
+    if fmt == "jsonl":
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(fp)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_manifest(seating, fp, fmt="csv", booked_only=True, chunk_size=1000):
+    sql = "SELECT seat_id, status, group_code FROM seats WHERE flight_id = ?"
+    if booked_only:
+        sql += f" AND status = {BOOKED}"
+    sql += " ORDER BY seat_id"
+    writer = csv.writer(fp) if fmt == "csv" else None
+    if writer:
+        writer.writerow(MANIFEST_FIELDS)
+    count = 0
+    with seating.db.connection() as conn:
+        cursor = conn.execute(sql, (seating.flight_id,))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            rows = [(seating.seat_label(seat_id), STATUS_NAMES[status], GROUP_NAMES[group_code])
+                    for seat_id, status, group_code in rows]
+            if writer:
+                writer.writerows(rows)
+            else:
+                fp.writelines(json.dumps(dict(zip(MANIFEST_FIELDS, row))) + "\n" for row in rows)
+            count += len(rows)
+    return count
+
+
+def import_manifest(seating, fp, fmt="csv", chunk_size=500):
+    # Rows with status "Available" cancel the seat, every other row books it
+    # for its special_group. The whole file is one transaction, read and
+    # applied chunk by chunk so memory stays bounded by chunk_size. Each chunk
+    # is priced up front through conn, so the surge follows earlier chunks.
+    def apply(conn):
+        booked = canceled = 0
+        failures = []
+        for chunk in chunked(read_manifest(fp, fmt), chunk_size):
+            table = seating.fare_table_in(conn)
+            for record in chunk:
+                seat = (record.get("seat") or "").strip().upper()
+                fares = seating.seat_fares(seat, table)
+                if (record.get("status") or "").strip().capitalize() == "Available":
+                    success, msg = seating.apply_cancellation(conn, seat, fares)
+                    canceled += success
+                else:
+                    group_type = record.get("special_group") or None
+                    fare = None if fares is None else fares[GROUP_CODES.get(group_type, 0)]
+                    success, msg = seating.apply_booking(conn, seat, fare, group_type)
+                    booked += success
+                if not success:
+                    failures.append((seat, msg))
+        return {"booked": booked, "canceled": canceled, "failures": failures}
+    return seating.run_waitlist_write(apply)
@@ -0,0 +1,123 @@
+import functools
+import os
+import threading
+import time
+
+from skyseats import db
+
+
+class Metrics:
+    # Totals are process-wide and shared by every session. Statement and row
+    # counters are per thread, which is also per Streamlit rerun, so calls and
+    # reruns are attributed by diffing them.
+    def __init__(self):
+        self.enabled = False
+        self.totals = {}  # method -> [calls, seconds, statements, rows, max seconds]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self):
+        self.enabled = True
+        db.set_trace_all(self.count_statement, self.count_rows)
+
+    def disable(self):
+        self.enabled = False
+        db.set_trace_all(None)
+
+    def counters(self):
+        local = self._local
+        if not hasattr(local, "statements"):
+            local.statements = 0
+            local.rows = 0
+            local.rerun = None
+        return local
+
+    def count_statement(self, sql):
+        self.counters().statements += 1
+
+    def count_rows(self, rows):
+        self.counters().rows += rows
+
+    def call(self, name, fn, args, kwargs):
+        local = self.counters()
+        statements, rows = local.statements, local.rows
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.record(name, time.perf_counter() - start, local.statements - statements, local.rows - rows)
+
+    def record(self, name, seconds, statements, rows):
+        with self._lock:
+            update(self.totals, name, seconds, statements, rows)
+        rerun = self.counters().rerun
+        if rerun is not None:
+            update(rerun["methods"], name, seconds, statements, rows)
+
+    def start_rerun(self):
+        local = self.counters()
+        local.rerun = {"started": time.perf_counter(), "statements": local.statements, "rows": local.rows,
+                       "methods": {}}
+
+    def finish_rerun(self):
+        local = self.counters()
+        rerun, local.rerun = local.rerun, None
+        if rerun is None:
+            return None
+        return {
+            "seconds": time.perf_counter() - rerun["started"],
+            "statements": local.statements - rerun["statements"],
+            "rows": local.rows - rerun["rows"],
+            "methods": rerun["methods"],
+        }
+
+    def export_prometheus(self):
+        with self._lock:
+            totals = {name: list(stats) for name, stats in self.totals.items()}
+        lines = []
+        for metric, index, kind, help_text in (
+                ("skyseats_calls_total", 0, "counter", "Calls per instrumented method."),
+                ("skyseats_call_seconds_total", 1, "counter", "Wall time spent per method."),
+                ("skyseats_sql_statements_total", 2, "counter", "SQL statements executed per method."),
+                ("skyseats_rows_total", 3, "counter", "Rows read or changed per method."),
+                ("skyseats_call_seconds_max", 4, "gauge", "Slowest single call per method.")):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, stats in sorted(totals.items()):
+                lines.append(f'{metric}{{method="{name}"}} {stats[index]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as fp:
+            fp.write(self.export_prometheus())
+        os.replace(tmp_path, path)
+
+
+def update(table, name, seconds, statements, rows):
+    stats = table.get(name)
+    if stats is None:
+        stats = table[name] = [0, 0.0, 0, 0, 0.0]
+    stats[0] += 1
+    stats[1] += seconds
+    stats[2] += statements
+    stats[3] += rows
+    stats[4] = max(stats[4], seconds)
+
+
+metrics = Metrics()
+
+
+def instrumented(fn):
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return fn(*args, **kwargs)
+        return metrics.call(name, fn, args, kwargs)
+    return wrapper
+
+
+if os.environ.get("SKYSEATS_METRICS") == "1":
+    metrics.enable()
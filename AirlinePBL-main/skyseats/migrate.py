@@ -0,0 +1,40 @@
+import argparse
+import os
+
+from skyseats.db import Database
+from skyseats.schema import SCHEMA_VERSION, ensure_schema
+
+
+def database_size(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+
+def migrate_database(path, vacuum=True):
+    before = database_size(path)
+    db = Database(os.path.abspath(path))
+    try:
+        old_version = db.fetchone("PRAGMA user_version")[0]
+        ensure_schema(db)
+        if vacuum:
+            db.execute("VACUUM")
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        db.close()
+    return old_version, before, database_size(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upgrade SkySeats airline databases to the current schema.")
+    parser.add_argument("paths", nargs="+", help="airline.db files to migrate in place")
+    parser.add_argument("--no-vacuum", action="store_true", help="skip rebuilding the file after migrating")
+    args = parser.parse_args(argv)
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"{path}: not found")
+            continue
+        old_version, before, after = migrate_database(path, vacuum=not args.no_vacuum)
+        print(f"{path}: schema {old_version} -> {SCHEMA_VERSION}, {before:,} -> {after:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
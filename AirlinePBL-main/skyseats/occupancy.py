@@ -0,0 +1,41 @@
+from skyseats.codes import AVAILABLE
+
+# Maps a status byte to "1" for a free seat and "0" otherwise, so a whole row of
+# status codes can be turned into a bitmask with one int(..., 2) call.
+_FREE_BITS = bytes(0x31 if code == AVAILABLE else 0x30 for code in range(256))
+
+
+class OccupancyIndex:
+    __slots__ = ("rows", "cols", "free")
+
+    def __init__(self, rows, cols, free):
+        self.rows = rows
+        self.cols = cols
+        self.free = free  # one int per row, bit c set when seat c of that row is free
+
+    @classmethod
+    def from_status(cls, status, rows, cols):
+        free = []
+        for row in range(rows):
+            bits = bytes(status[row * cols:(row + 1) * cols]).translate(_FREE_BITS)
+            free.append(int(bits[::-1], 2) if bits else 0)
+        return cls(rows, cols, free)
+
+    def copy(self):
+        return OccupancyIndex(self.rows, self.cols, list(self.free))
+
+    def without(self, held_rows):
+        # Copy with the seats in held_rows ({row: column bitmask}) taken out.
+        free = list(self.free)
+        for row, mask in held_rows.items():
+            free[row] &= ~mask
+        return OccupancyIndex(self.rows, self.cols, free)
+
+    def is_free(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols and bool(self.free[row] >> col & 1)
+
+    def mark_booked(self, row, col):
+        self.free[row] &= ~(1 << col)
+
+    def mark_free(self, row, col):
+        self.free[row] |= 1 << col
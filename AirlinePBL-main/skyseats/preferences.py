@@ -0,0 +1,96 @@
+import heapq
+import threading
+from functools import lru_cache
+
+from skyseats.codes import AVAILABLE
+
+# Seat preferences auto-assignment can honour. Front is plain row-major order.
+PREFERENCES = ("Front", "Window", "Aisle", "Near an exit", "Bulkhead", "Quiet")
+GROUP_PREFERENCES = {  # preference used when a passenger type gives none
+    None: "Front",
+    "Elderly": "Aisle",
+    "Disabled": "Near an exit",
+    "Infant": "Bulkhead",
+    "Silent": "Quiet",
+}
+EXIT_ROW_RESTRICTED = frozenset({"Elderly", "Disabled", "Infant"})  # offered exit-row seats only as a last resort
+
+
+def seat_keys(layout, preference):
+    # One sort key per seat position, lower is better; ties go front to back.
+    exit_rows = [row - 1 for row in layout.exit_rows]
+    bulkheads = {cabin.first_row - 1 for cabin in layout.cabins}
+    # Galleys sit ahead of each cabin and at the back of the aircraft.
+    galleys = sorted(bulkheads | {layout.rows - 1})
+    keys = []
+    for row, col in layout.coords:
+        window = col in (0, layout.cols - 1)
+        aisle = col in layout.aisles or col + 1 in layout.aisles
+        if preference == "Window":
+            rank = (not window,)
+        elif preference == "Aisle":
+            rank = (not aisle,)
+        elif preference == "Near an exit":
+            # Doors at both ends count as exits alongside the exit rows.
+            rank = (not aisle, min(abs(row - exit_row) for exit_row in (0, layout.rows - 1, *exit_rows)))
+        elif preference == "Bulkhead":
+            rank = (row not in bulkheads,)
+        elif preference == "Quiet":
+            rank = (-min(abs(row - galley) for galley in galleys),)
+        else:
+            rank = ()
+        keys.append((*rank, row, col))
+    return keys
+
+
+@lru_cache(maxsize=None)
+def seat_ranks(layout, preference, avoid_exit_rows=False):
+    # Position -> rank (0 is the best seat), computed once per layout.
+    keys = seat_keys(layout, preference)
+    order = sorted(range(len(keys)), key=lambda pos: (avoid_exit_rows and layout.is_exit_row(layout.coords[pos][0]),
+                                                      keys[pos]))
+    ranks = [0] * len(keys)
+    for rank, pos in enumerate(order):
+        ranks[pos] = rank
+    return tuple(ranks)
+
+
+class SeatQueue:
+    # Seats of one flight that may be free, best ranked first. Seats are not
+    # removed when booked elsewhere; pop() drops them when they surface (lazy
+    # deletion), and freed seats are pushed back by whoever sees them free.
+    def __init__(self, ranks):
+        self.ranks = ranks
+        self.heap = []
+        self.seq = None  # journal seq the queue has caught up with
+        self._lock = threading.Lock()
+
+    def rebuild(self, status, seq):
+        heap = [(rank, pos) for pos, rank in enumerate(self.ranks) if status[pos] == AVAILABLE]
+        heapq.heapify(heap)
+        with self._lock:
+            self.heap = heap
+            self.seq = seq
+
+    def push(self, positions, seq):
+        with self._lock:
+            for pos in positions:
+                heapq.heappush(self.heap, (self.ranks[pos], pos))
+            self.seq = max(self.seq, seq)
+
+    def pop(self, status, occupancy, coords):
+        # Best seat that is free in occupancy, or None. Seats that are free but
+        # held stay queued for when the hold ends.
+        held = []
+        with self._lock:
+            try:
+                while self.heap:
+                    pos = heapq.heappop(self.heap)[1]
+                    if occupancy.is_free(*coords[pos]):
+                        return pos
+                    if status[pos] == AVAILABLE:
+                        held.append(pos)
+                return None
+            finally:
+                for pos in held:
+                    heapq.heappush(self.heap, (self.ranks[pos], pos))
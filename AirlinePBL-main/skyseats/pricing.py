@@ -0,0 +1,85 @@
+import numpy as np
+
+from skyseats.codes import BOOKED, GROUP_NAMES
+
+BASE_FARE = 500.0  # base fare in INR
+
+# Multipliers applied to BASE_FARE. Every rule is a table so fares can be
+# computed for a whole cabin in a few array operations.
+GROUP_MULTIPLIERS = {
+    None: 1.0,
+    "Elderly": 0.8,  # 20% discount
+    "Disabled": 0.7,  # 30% discount
+    "Infant": 0.5,  # 50% discount
+    "Silent": 0.9,  # 10% discount
+}
+ROW_PREMIUMS = (  # (first row, last row, multiplier), rows counted from 1
+    (1, 3, 1.15),
+    (4, 5, 1.05),
+)
+POSITION_PREMIUMS = {"window": 1.10, "aisle": 1.05, "middle": 1.0}
+LOAD_FACTOR_SURGE = (  # (minimum load factor, multiplier), ascending
+    (0.0, 1.0),
+    (0.5, 1.1),
+    (0.75, 1.25),
+    (0.9, 1.5),
+)
+
+
+class FareRules:
+    def __init__(self, base_fare=BASE_FARE, group_multipliers=GROUP_MULTIPLIERS, row_premiums=ROW_PREMIUMS,
+                 position_premiums=POSITION_PREMIUMS, load_factor_surge=LOAD_FACTOR_SURGE):
+        self.base_fare = base_fare
+        self.group_multipliers = np.array([group_multipliers.get(name, 1.0) for name in GROUP_NAMES])
+        self.row_premiums = row_premiums
+        self.position_premiums = position_premiums
+        self.surge_thresholds = np.array([threshold for threshold, _ in load_factor_surge])
+        self.surge_multipliers = np.array([multiplier for _, multiplier in load_factor_surge])
+
+    def seat_multipliers(self, rows, cols, aisles):
+        # One multiplier per seat in row-major order; depends on the layout only.
+        row_factor = np.ones(rows)
+        for first, last, multiplier in self.row_premiums:
+            row_factor[max(first, 1) - 1:min(last, rows)] = multiplier
+        col_factor = np.full(cols, self.position_premiums["middle"])
+        for aisle in aisles:
+            col_factor[[aisle - 1, aisle]] = self.position_premiums["aisle"]
+        col_factor[[0, cols - 1]] = self.position_premiums["window"]
+        return np.outer(row_factor, col_factor).ravel()
+
+    def surge(self, load_factor):
+        return float(self.surge_multipliers[np.searchsorted(self.surge_thresholds, load_factor, side="right") - 1])
+
+
+DEFAULT_RULES = FareRules()
+
+
+class FareTable:
+    __slots__ = ("fares", "load_factor", "surge")
+
+    def __init__(self, fares, load_factor, surge):
+        self.fares = fares  # float array, [seat position, group code]
+        self.load_factor = load_factor
+        self.surge = surge
+
+    def quote(self, positions, group_codes):
+        return self.fares[np.asarray(positions), np.asarray(group_codes)]
+
+
+def seat_fare(status, seat_multiplier, group_code, rules=DEFAULT_RULES):
+    # One entry of build_fare_table(), computed the same way without the table.
+    load_factor = status.count(BOOKED) / len(status) if len(status) else 0.0
+    return float(np.round(rules.base_fare * rules.surge(load_factor) *
+                          (seat_multiplier * rules.group_multipliers[group_code]), 2))
+
+
+def build_fare_table(status, seat_multipliers, rules=DEFAULT_RULES):
+    statuses = np.frombuffer(bytes(status), dtype=np.uint8)
+    load_factor = float(np.count_nonzero(statuses == BOOKED)) / len(statuses) if len(statuses) else 0.0
+    return fare_table(load_factor, seat_multipliers, rules)
+
+
+def fare_table(load_factor, seat_multipliers, rules=DEFAULT_RULES):
+    surge = rules.surge(load_factor)
+    fares = np.round(rules.base_fare * surge * np.outer(seat_multipliers, rules.group_multipliers), 2)
+    return FareTable(fares, load_factor, surge)
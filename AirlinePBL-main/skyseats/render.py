@@ -0,0 +1,51 @@
+from html import escape
+
+from skyseats.codes import AVAILABLE
+
+# Seat colours indexed by code: passenger groups by group code (0 falls back to
+# the status colour) and statuses by status byte, every unavailable one red.
+GROUP_COLORS = (None, "#ffcc00", "#6f42c1", "#17a2b8", "#343a40")
+STATUS_COLORS = tuple("#28a745" if code == AVAILABLE else "#dc3545" for code in range(256))
+HELD_COLOR = "#fd7e14"
+
+SEAT_MAP_CSS = (
+    "<style>"
+    ".seat-map{display:flex;flex-direction:column;align-items:center;gap:8px;margin:8px 0}"
+    ".seat-row{display:flex;gap:8px}"
+    ".seat{width:80px;height:50px;border-radius:10px;color:white;text-align:center;font-weight:bold;"
+    "font-size:14px;line-height:1.2em;padding-top:5px;box-sizing:border-box}"
+    ".seat small{display:block;font-size:10px;font-weight:normal}"
+    ".aisle{width:20px}"
+    ".row-gap{height:20px}"
+    "</style>"
+)
+
+
+def render_seat(seat, color, group, fare=None):
+    label = escape(seat)
+    if group:
+        label += f"<small>({escape(group)})</small>"
+    elif fare is not None:
+        label += f"<small>₹{fare:.0f}</small>"
+    return f"<div class='seat' style='background-color:{color}'>{label}</div>"
+
+
+def render_seat_map(layout, fares=None):
+    # layout is the row list returned by AirlineSeating.get_seating_display()
+    # and fares an optional {seat: fare} shown on seats that are for sale.
+    # Everything goes into one HTML string so the page emits a single element.
+    fares = fares or {}
+    parts = [SEAT_MAP_CSS, "<div class='seat-map'>"]
+    for row in layout:
+        if any(seat[0] == "ROW GAP" for seat in row):
+            parts.append("<div class='row-gap'></div>")
+            continue
+        parts.append("<div class='seat-row'>")
+        for seat, color, group in row:
+            if seat == "AISLE":
+                parts.append("<div class='aisle'></div>")
+            else:
+                parts.append(render_seat(seat, color, group, fares.get(seat)))
+        parts.append("</div>")
+    parts.append("</div>")
+    return "".join(parts)
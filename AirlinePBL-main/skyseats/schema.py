@@ -0,0 +1,243 @@
+import threading
+
+from skyseats.codes import AVAILABLE, BOOKED, GROUP_CODES, STATUS_CODES, pack_seat_id
+from skyseats.journal import positions, write_snapshot
+from skyseats.layouts import DEFAULT_LAYOUT, get_layout
+from skyseats.pricing import DEFAULT_RULES, build_fare_table
+
+DEFAULT_FLIGHT = "SK101"
+
+FLIGHTS_TABLE = '''CREATE TABLE IF NOT EXISTS flights (
+                   flight_id INTEGER PRIMARY KEY,
+                   code TEXT NOT NULL UNIQUE,
+                   rows INTEGER NOT NULL,
+                   seat_labels TEXT NOT NULL,
+                   aisles TEXT NOT NULL DEFAULT '3',
+                   layout TEXT DEFAULT NULL,
+                   version INTEGER NOT NULL DEFAULT 0)'''
+
+# Status and special_group are the small integer codes from skyseats.codes and
+# seat_id is a packed (row, col). fare is what the booking was charged, 0
+# while the seat is free. WITHOUT ROWID stores each row inside the primary
+# key b-tree, clustered by flight, instead of beside a hidden rowid.
+SEATS_TABLE = '''CREATE TABLE IF NOT EXISTS seats (
+                 flight_id INTEGER NOT NULL REFERENCES flights (flight_id),
+                 seat_id INTEGER NOT NULL,
+                 status INTEGER NOT NULL DEFAULT 0,
+                 group_code INTEGER NOT NULL DEFAULT 0,
+                 fare REAL NOT NULL DEFAULT 0,
+                 PRIMARY KEY (flight_id, seat_id)) WITHOUT ROWID'''
+
+# Covers every column the analytics queries read (seat_id comes along as part
+# of the primary key), so they never touch the table itself.
+SEATS_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_seats_flight_status_group ON seats (flight_id, status, group_code, fare)",
+)
+
+# Every seat change bumps its flight's version in the same statement, so a
+# cached seat map can be revalidated with a single-row lookup.
+SEATS_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS seats_bump_flight_version AFTER UPDATE ON seats
+       BEGIN
+           UPDATE flights SET version = version + 1 WHERE flight_id = NEW.flight_id;
+       END''',
+)
+
+# Seat holds are kept in memory and written here lazily, only so they survive
+# a restart; expires_at is a Unix timestamp.
+SEAT_HOLDS_TABLE = '''CREATE TABLE IF NOT EXISTS seat_holds (
+                      flight_id INTEGER NOT NULL REFERENCES flights (flight_id),
+                      seat_id INTEGER NOT NULL,
+                      holder TEXT NOT NULL,
+                      expires_at REAL NOT NULL,
+                      PRIMARY KEY (flight_id, seat_id)) WITHOUT ROWID'''
+
+# Passengers waiting for a seat on a full flight. seat_id stays NULL while the
+# passenger waits and is set to the seat they were given on promotion.
+WAITLIST_TABLE = '''CREATE TABLE IF NOT EXISTS waitlist (
+                    entry_id INTEGER PRIMARY KEY,
+                    flight_id INTEGER NOT NULL REFERENCES flights (flight_id),
+                    passenger TEXT NOT NULL,
+                    group_code INTEGER NOT NULL DEFAULT 0,
+                    seat_id INTEGER DEFAULT NULL)'''
+
+WAITLIST_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_waitlist_flight_passenger ON waitlist (flight_id, passenger)",
+)
+
+# Append-only history of seat changes. Every status or group change on seats
+# is copied here by a trigger and numbered by seq, which only ever grows
+# (AUTOINCREMENT never reuses a value), so readers can ask for the changes
+# after the last seq they saw.
+SEAT_JOURNAL_TABLE = '''CREATE TABLE IF NOT EXISTS seat_journal (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        flight_id INTEGER NOT NULL,
+                        seat_id INTEGER NOT NULL,
+                        status INTEGER NOT NULL,
+                        group_code INTEGER NOT NULL)'''
+
+SEAT_JOURNAL_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_seat_journal_flight_seq ON seat_journal (flight_id, seq)",
+)
+
+SEAT_JOURNAL_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS seats_journal AFTER UPDATE OF status, group_code ON seats
+       WHEN OLD.status IS NOT NEW.status OR OLD.group_code IS NOT NEW.group_code
+       BEGIN
+           INSERT INTO seat_journal (flight_id, seat_id, status, group_code)
+           VALUES (NEW.flight_id, NEW.seat_id, NEW.status, NEW.group_code);
+       END''',
+)
+
+# Periodic copies of a flight's seats, one status byte and one group byte per
+# seat position, taken at journal position seq. Replay starts from the newest
+# one instead of the beginning of the journal.
+SEAT_SNAPSHOTS_TABLE = '''CREATE TABLE IF NOT EXISTS seat_snapshots (
+                          flight_id INTEGER NOT NULL REFERENCES flights (flight_id),
+                          seq INTEGER NOT NULL,
+                          status BLOB NOT NULL,
+                          groups BLOB NOT NULL,
+                          PRIMARY KEY (flight_id, seq))'''
+
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def create_seats_table(conn):
+    conn.execute(SEATS_TABLE)
+    for statement in SEATS_INDEXES + SEATS_TRIGGERS:
+        conn.execute(statement)
+
+
+def insert_flight(conn, code, rows, seat_labels, aisles, layout=None):
+    cursor = conn.execute("INSERT INTO flights (code, rows, seat_labels, aisles, layout) VALUES (?, ?, ?, ?, ?)",
+                          (code, rows, seat_labels, ",".join(map(str, aisles)), layout))
+    flight_id = cursor.lastrowid
+    conn.executemany("INSERT INTO seats (flight_id, seat_id) VALUES (?, ?)",
+                     ((flight_id, pack_seat_id(row, col)) for row in range(rows) for col in range(len(seat_labels))))
+    return flight_id
+
+
+def migrate_to_flights(conn):
+    columns = table_columns(conn, "seats")
+    legacy = bool(columns) and "flight_id" not in columns
+    if legacy:
+        conn.execute("ALTER TABLE seats RENAME TO seats_legacy")
+    conn.execute(FLIGHTS_TABLE)
+    conn.execute('''CREATE TABLE IF NOT EXISTS seats (
+                    flight_id INTEGER NOT NULL REFERENCES flights (flight_id),
+                    seat TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'Available',
+                    special_group TEXT DEFAULT NULL,
+                    PRIMARY KEY (flight_id, seat))''')
+    if conn.execute("SELECT 1 FROM flights LIMIT 1").fetchone() is None:
+        flight_id = conn.execute("INSERT INTO flights (code, rows, seat_labels, aisles) VALUES (?, 10, 'ABCDEF', '3')",
+                                 (DEFAULT_FLIGHT,)).lastrowid
+        conn.executemany("INSERT INTO seats (flight_id, seat) VALUES (?, ?)",
+                         ((flight_id, f"{row}{letter}") for row in range(1, 11) for letter in "ABCDEF"))
+        if legacy:
+            conn.execute('''UPDATE seats SET status = legacy.status, special_group = legacy.special_group
+                            FROM seats_legacy AS legacy
+                            WHERE seats.flight_id = ? AND seats.seat = legacy.seat''', (flight_id,))
+    if legacy:
+        conn.execute("DROP TABLE seats_legacy")
+
+
+def migrate_to_compact_seats(conn):
+    conn.execute("DROP TRIGGER IF EXISTS seats_bump_flight_version")
+    conn.execute("DROP INDEX IF EXISTS idx_seats_flight_status")
+    conn.execute("DROP INDEX IF EXISTS idx_seats_flight_status_group")
+    conn.execute("ALTER TABLE seats RENAME TO seats_text")
+    create_seats_table(conn)
+    for flight_id, seat_labels in conn.execute("SELECT flight_id, seat_labels FROM flights").fetchall():
+        cols = {letter: col for col, letter in enumerate(seat_labels)}
+        rows = conn.execute("SELECT seat, status, special_group FROM seats_text WHERE flight_id = ?", (flight_id,))
+        conn.executemany("INSERT INTO seats (flight_id, seat_id, status, group_code) VALUES (?, ?, ?, ?)",
+                         ((flight_id, pack_seat_id(int(seat[:-1]) - 1, cols[seat[-1]]),
+                           STATUS_CODES.get(status, AVAILABLE), GROUP_CODES.get(group, 0))
+                          for seat, status, group in rows.fetchall()))
+    conn.execute("DROP TABLE seats_text")
+
+
+def migrate_to_seat_holds(conn):
+    conn.execute(SEAT_HOLDS_TABLE)
+
+
+def migrate_to_waitlist(conn):
+    conn.execute(WAITLIST_TABLE)
+    for statement in WAITLIST_INDEXES:
+        conn.execute(statement)
+
+
+def migrate_to_layouts(conn):
+    # Flights still shaped like the original 10-row cabin get its named layout.
+    if "layout" not in table_columns(conn, "flights"):
+        conn.execute("ALTER TABLE flights ADD COLUMN layout TEXT DEFAULT NULL")
+    conn.execute("UPDATE flights SET layout = ? WHERE rows = 10 AND seat_labels = 'ABCDEF' AND aisles = '3'",
+                 (DEFAULT_LAYOUT.name,))
+
+
+def migrate_to_journal(conn):
+    conn.execute(SEAT_JOURNAL_TABLE)
+    conn.execute(SEAT_SNAPSHOTS_TABLE)
+    for statement in SEAT_JOURNAL_INDEXES + SEAT_JOURNAL_TRIGGERS:
+        conn.execute(statement)
+    # Seats booked before the journal existed only survive replay through a snapshot.
+    for flight_id, rows, seat_labels in conn.execute("SELECT flight_id, rows, seat_labels FROM flights").fetchall():
+        write_snapshot(conn, flight_id, len(seat_labels), rows * len(seat_labels))
+
+
+def migrate_to_seat_fares(conn):
+    if "fare" not in table_columns(conn, "seats"):
+        conn.execute("ALTER TABLE seats ADD COLUMN fare REAL NOT NULL DEFAULT 0")
+    conn.execute("DROP INDEX IF EXISTS idx_seats_flight_status")
+    for statement in SEATS_INDEXES:
+        conn.execute(statement)
+    # Bookings made before fares were stored are priced at today's fares.
+    flights = conn.execute("SELECT flight_id, rows, seat_labels, aisles, layout FROM flights").fetchall()
+    for flight_id, rows, seat_labels, aisles, layout in flights:
+        layout = get_layout(layout, rows, seat_labels, tuple(int(aisle) for aisle in aisles.split(",") if aisle))
+        booked = conn.execute("SELECT seat_id, group_code FROM seats WHERE flight_id = ? AND status = ?",
+                              (flight_id, BOOKED)).fetchall()
+        booked_positions = list(positions([seat_id for seat_id, _ in booked], layout.cols))
+        status = bytearray(rows * layout.cols)
+        for pos in booked_positions:
+            status[pos] = BOOKED
+        fares = build_fare_table(status, DEFAULT_RULES.seat_multipliers(rows, layout.cols, layout.aisles)).fares
+        conn.executemany("UPDATE seats SET fare = ? WHERE flight_id = ? AND seat_id = ?",
+                         ((float(fares[pos, group_code]), flight_id, seat_id)
+                          for pos, (seat_id, group_code) in zip(booked_positions, booked)))
+
+
+MIGRATIONS = (
+    migrate_to_flights,
+    migrate_to_compact_seats,
+    migrate_to_seat_holds,
+    migrate_to_waitlist,
+    migrate_to_layouts,
+    migrate_to_journal,
+    migrate_to_seat_fares,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_initialized = set()
+_initialized_lock = threading.Lock()
+
+
+def ensure_schema(db):
+    # Runs at most once per database per process. An up-to-date file is
+    # recognised from PRAGMA user_version without taking the write lock.
+    with _initialized_lock:
+        if db.db_path in _initialized:
+            return
+        if db.fetchone("PRAGMA user_version")[0] < SCHEMA_VERSION:
+            def migrate(conn):
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                for step in MIGRATIONS[version:]:
+                    step(conn)
+                if version < SCHEMA_VERSION:
+                    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            db.write(migrate)
+        _initialized.add(db.db_path)
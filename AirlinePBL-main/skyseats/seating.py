@@ -0,0 +1,571 @@
+from collections import deque
+
+from skyseats.codes import (AVAILABLE, BOOKED, GROUP_CODES, GROUP_NAMES, HELD, INVALID, SEAT_COL_BITS, SEAT_COL_MASK,
+                            STATUS_NAMES)
+from skyseats.db import get_database
+from skyseats import journal
+from skyseats.groups import GroupSeatingEngine, plan_parties
+from skyseats.holds import HoldTable
+from skyseats.layouts import AISLE, DEFAULT_LAYOUT
+from skyseats.metrics import instrumented
+from skyseats.occupancy import OccupancyIndex
+from skyseats.preferences import EXIT_ROW_RESTRICTED, GROUP_PREFERENCES, PREFERENCES, SeatQueue, seat_ranks
+from skyseats.pricing import DEFAULT_RULES, build_fare_table, fare_table, seat_fare
+from skyseats.render import GROUP_COLORS, HELD_COLOR, STATUS_COLORS, render_seat_map
+from skyseats.snapshot import SeatMap, seat_map_cache
+from skyseats.waitlist import WAITLIST_PRIORITY, Waitlist
+
+SNAPSHOT_CHECK_EVERY = 100  # writes between checks for a due journal snapshot
+
+
+class AirlineSeating:
+    def __init__(self, db_path="airline.db", flight_id=1, layout=DEFAULT_LAYOUT):
+        self.db_path = db_path
+        self.flight_id = flight_id
+        self.layout = layout
+        self.rows = layout.rows
+        self.seat_labels = layout.seat_labels
+        self.aisles = layout.aisles  # column indexes that have an aisle on their left
+        self.db = get_database(db_path)
+        self.cache_key = (self.db.db_path, flight_id)
+        # Lookup tables compiled once per layout: position -> label, label ->
+        # position and position -> packed seat id. Positions are row-major.
+        self.cols = layout.cols
+        self.seats = layout.seats
+        self.seat_index = layout.seat_index
+        self.seat_ids = layout.seat_ids
+        self.fare_rules = DEFAULT_RULES
+        self.writer = None  # optional BookingWriter that serializes and group-commits writes
+        self.seat_multipliers = self.fare_rules.seat_multipliers(self.rows, self.cols, self.aisles)
+        self.holds = HoldTable(self.cols, flush=self.persist_holds)
+        self.holds.load((self.seat_position(seat_id), expires_at, holder) for seat_id, expires_at, holder in
+                        self.db.fetchall("SELECT seat_id, expires_at, holder FROM seat_holds WHERE flight_id = ?",
+                                         (flight_id,)))
+        self.waitlist = Waitlist(flight_id)
+        self._writes = 0  # writes since start-up, to check for a due journal snapshot now and then
+        self._derived = {}  # name -> ((seat map version, holds version), value)
+        self._seat_queues = {}  # (preference, avoid exit rows) -> SeatQueue
+
+    def seat_id(self, seat):
+        pos = self.seat_index.get(seat)
+        return self.seat_ids[pos] if pos is not None else None
+
+    def seat_position(self, seat_id):
+        return (seat_id >> SEAT_COL_BITS) * self.cols + (seat_id & SEAT_COL_MASK)
+
+    def seat_label(self, seat_id):
+        return self.seats[self.seat_position(seat_id)]
+
+    @instrumented
+    def get_seat_status(self, seat, holder=None):
+        # A seat held by holder is still "Available" to them.
+        seat_id = self.seat_id(seat)
+        result = seat_id is not None and self.db.fetchone(
+            "SELECT status FROM seats WHERE flight_id = ? AND seat_id = ?", (self.flight_id, seat_id))
+        if not result:
+            return "Invalid"
+        if result[0] == AVAILABLE and self.holds.holder_of(self.seat_index[seat]) not in (None, holder):
+            return STATUS_NAMES[HELD]
+        return STATUS_NAMES[result[0]]
+
+    @instrumented
+    def get_seat_group(self, seat):
+        seat_id = self.seat_id(seat)
+        result = seat_id is not None and self.db.fetchone(
+            "SELECT group_code FROM seats WHERE flight_id = ? AND seat_id = ?", (self.flight_id, seat_id))
+        return GROUP_NAMES[result[0]] if result else None
+
+    @instrumented
+    def get_seat_map(self):
+        data_version = self.db.data_version()
+        checked, seat_map = seat_map_cache.get(self.cache_key)
+        if seat_map is not None and checked == data_version:
+            return seat_map
+        with self.db.transaction() as conn:
+            version = conn.execute("SELECT version FROM flights WHERE flight_id = ?", (self.flight_id,)).fetchone()[0]
+            if seat_map is None:
+                seat_map = self.load_seat_map(conn, version)
+            elif seat_map.version != version:
+                # A few changes are cheaper to replay from the journal than a reload.
+                limit = len(self.seats) // 8
+                changes = journal.changes_since(conn, self.flight_id, seat_map.seq, limit + 1)
+                if len(changes) <= limit:
+                    seat_map = self.apply_changes(seat_map, version, changes)
+                else:
+                    seat_map = self.load_seat_map(conn, version)
+        seat_map_cache.put(self.cache_key, data_version, seat_map)
+        return seat_map
+
+    def load_seat_map(self, conn, version):
+        status = bytearray([INVALID]) * len(self.seats)
+        groups = bytearray(len(self.seats))
+        rows = conn.execute("SELECT seat_id, status, group_code FROM seats WHERE flight_id = ?", (self.flight_id,))
+        for seat_id, seat_status, group_code in rows:
+            pos = self.seat_position(seat_id)
+            status[pos] = seat_status
+            groups[pos] = group_code
+        if self.db.count_rows:
+            self.db.count_rows(len(self.seats))
+        return SeatMap(version, self.seats, self.seat_index, status, groups, journal.latest_seq(conn, self.flight_id))
+
+    def apply_changes(self, seat_map, version, changes):
+        # New snapshot from seat_map plus journal changes; its occupancy index
+        # is patched too when the old one had been built.
+        status, groups = bytearray(seat_map.status), bytearray(seat_map.groups)
+        journal.apply_changes(status, groups, changes, self.cols)
+        updated = SeatMap(version, self.seats, self.seat_index, status, groups,
+                          changes[-1][0] if changes else seat_map.seq)
+        if seat_map.occupancy is not None:
+            updated.occupancy = seat_map.occupancy.copy()
+            for pos in {self.seat_position(change[1]) for change in changes}:
+                if status[pos] == AVAILABLE:
+                    updated.occupancy.mark_free(*self.layout.coords[pos])
+                else:
+                    updated.occupancy.mark_booked(*self.layout.coords[pos])
+        if self.db.count_rows:
+            self.db.count_rows(len(changes))
+        return updated
+
+    @instrumented
+    def journal_seq(self):
+        with self.db.connection() as conn:
+            return journal.latest_seq(conn, self.flight_id)
+
+    @instrumented
+    def changes_since(self, seq):
+        # Seat changes after journal position seq as (seq, seat, status, group),
+        # oldest first. Pass the last seq seen to get only what is new.
+        with self.db.connection() as conn:
+            changes = journal.changes_since(conn, self.flight_id, seq)
+        return [(change_seq, self.seat_label(seat_id), STATUS_NAMES[status], GROUP_NAMES[group_code])
+                for change_seq, seat_id, status, group_code in changes]
+
+    @instrumented
+    def replay_seat_map(self, seq=None):
+        # Seat map rebuilt from the newest snapshot plus the journal, at seq or now.
+        with self.db.transaction() as conn:
+            seq, status, groups = journal.replay(conn, self.flight_id, self.cols, len(self.seats), seq)
+        return SeatMap(None, self.seats, self.seat_index, status, groups, seq)
+
+    def get_occupancy(self, seat_map=None):
+        seat_map = seat_map or self.get_seat_map()
+        if seat_map.occupancy is None:
+            seat_map.occupancy = OccupancyIndex.from_status(seat_map.status, self.rows, self.cols)
+        return seat_map.occupancy
+
+    def derived(self, name, build, seat_map=None):
+        # Memoizes values that depend on both the seat map and the holds;
+        # build gets (seat_map, holds, held_rows) as captured for the key.
+        # The holds are only copied when the cached value is out of date.
+        seat_map = seat_map or self.get_seat_map()
+        self.holds.expire()
+        cached = self._derived.get(name)
+        if cached is not None and cached[0] == (seat_map.version, self.holds.version):
+            return cached[1]
+        version, holds, held_rows = self.holds.snapshot()
+        cached = self._derived[name] = ((seat_map.version, version), build(seat_map, holds, held_rows))
+        return cached[1]
+
+    def get_available(self, seat_map=None):
+        # Occupancy with held seats masked out, so seat finders skip them
+        # without a query.
+        def build(seat_map, holds, held_rows):
+            occupancy = self.get_occupancy(seat_map)
+            return occupancy.without(held_rows) if held_rows else occupancy
+        return self.derived("available", build, seat_map)
+
+    def persist_holds(self, changes):
+        # changes is {position: (expires_at, holder) or None}, from HoldTable.flush.
+        def persist(conn):
+            conn.executemany("DELETE FROM seat_holds WHERE flight_id = ? AND seat_id = ?",
+                             [(self.flight_id, self.seat_ids[pos]) for pos, entry in changes.items() if entry is None])
+            conn.executemany("INSERT OR REPLACE INTO seat_holds (flight_id, seat_id, holder, expires_at) "
+                             "VALUES (?, ?, ?, ?)",
+                             [(self.flight_id, self.seat_ids[pos], entry[1], entry[0])
+                              for pos, entry in changes.items() if entry is not None])
+        self.db.write(persist)
+
+    @instrumented
+    def hold_seat(self, seat, holder, ttl=None):
+        pos = self.seat_index.get(seat)
+        if pos is None:
+            return False, f"Invalid seat number: {seat}"
+        if self.get_seat_map().status[pos] != AVAILABLE:
+            return False, f"Seat {seat} is already booked!"
+        if not self.holds.hold(pos, holder, ttl):
+            return False, f"Seat {seat} is being held by another passenger."
+        return True, f"Seat {seat} is held for you for {(ttl or self.holds.ttl) / 60:.0f} minutes."
+
+    @instrumented
+    def release_hold(self, seat, holder=None):
+        pos = self.seat_index.get(seat)
+        if pos is None:
+            return False, f"Invalid seat number: {seat}"
+        if self.holds.release(pos, holder):
+            return True, f"Hold on seat {seat} released."
+        return False, f"Seat {seat} is not held by you."
+
+    def apply_booking(self, conn, seat, fare, group_type=None, holder=None):
+        # fare is what the passenger was quoted, priced before the write: a
+        # write callback never reads the seat map, which takes a second
+        # pooled connection.
+        seat_id = self.seat_id(seat)
+        if seat_id is None:
+            return False, f"Invalid seat number: {seat}"
+        if group_type not in GROUP_CODES:
+            return False, f"Unknown passenger type: {group_type}"
+        pos = self.seat_index[seat]
+        held_by = self.holds.holder_of(pos)
+        if held_by is not None and held_by != holder:
+            return False, f"Seat {seat} is being held by another passenger."
+        group_code = GROUP_CODES[group_type]
+        updated = conn.execute("UPDATE seats SET status = ?, group_code = ?, fare = ? "
+                               "WHERE flight_id = ? AND seat_id = ? AND status = ?",
+                               (BOOKED, group_code, fare, self.flight_id, seat_id, AVAILABLE)).rowcount
+        if updated:
+            if held_by is not None:
+                self.holds.release(pos, holder)
+            return True, f"Seat {seat} booked successfully!"
+        return False, f"Seat {seat} is already booked!"
+
+    def apply_cancellation(self, conn, seat, fares):
+        # fares are the seat's fares by group code (see seat_fares), in case a
+        # waitlisted passenger is promoted into it.
+        seat_id = self.seat_id(seat)
+        if seat_id is None:
+            return False, f"Invalid seat number: {seat}"
+        updated = conn.execute("UPDATE seats SET status = ?, group_code = 0, fare = 0 "
+                               "WHERE flight_id = ? AND seat_id = ? AND status = ?",
+                               (AVAILABLE, self.flight_id, seat_id, BOOKED)).rowcount
+        if not updated:
+            return False, f"Seat {seat} is not currently booked."
+        # The freed seat goes straight to the first passenger on the waitlist.
+        promoted = self.waitlist.promote(conn, seat_id)
+        if promoted is None:
+            return True, f"Seat {seat} canceled successfully."
+        passenger, group_code = promoted
+        conn.execute("UPDATE seats SET status = ?, group_code = ?, fare = ? WHERE flight_id = ? AND seat_id = ?",
+                     (BOOKED, group_code, float(fares[group_code]), self.flight_id, seat_id))
+        return True, f"Seat {seat} canceled successfully and given to waitlisted passenger {passenger}."
+
+    def run_write(self, fn, transaction=False):
+        if self.writer is not None:
+            result = self.writer.submit(fn).result()
+        else:
+            result = self.db.write(fn) if transaction else self.db.run(fn)
+        self._writes += 1
+        if self._writes % SNAPSHOT_CHECK_EVERY == 0:
+            def snapshot(conn):
+                return journal.snapshot_if_due(conn, self.flight_id, self.cols, len(self.seats))
+            if self.writer is not None:
+                # Joins the writer's next batch; nobody waits on it.
+                self.writer.submit(snapshot)
+            else:
+                self.db.write(snapshot)
+        return result
+
+    def run_waitlist_write(self, fn):
+        try:
+            return self.run_write(fn, transaction=True)
+        except Exception:
+            # The heap may hold changes that were just rolled back; reload it.
+            self.waitlist.reset()
+            raise
+
+    @instrumented
+    def book_seat(self, seat, group_type=None, holder=None, fare=None):
+        # Without a quoted fare the seat is charged its current fare.
+        if fare is None and seat in self.seat_index:
+            fare = self.seat_fare(self.seat_index[seat], GROUP_CODES.get(group_type, 0))
+        return self.run_write(lambda conn: self.apply_booking(conn, seat, fare, group_type, holder))
+
+    @instrumented
+    def cancel_seat(self, seat):
+        fares = self.seat_fares(seat)
+        return self.run_waitlist_write(lambda conn: self.apply_cancellation(conn, seat, fares))
+
+    @instrumented
+    def book_seats(self, bookings):
+        # bookings is an iterable of (seat, group_type); all of them are applied
+        # in one transaction and reported as (seat, success, message).
+        bookings = list(bookings)
+        fares = self.quote_fares(bookings)
+
+        def book(conn):
+            return [(seat, *self.apply_booking(conn, seat, fares.get(seat), group_type))
+                    for seat, group_type in bookings]
+        return self.run_write(book, transaction=True)
+
+    @instrumented
+    def cancel_seats(self, seats):
+        seats = list(seats)
+        seat_map = self.get_seat_map()
+        fares = {seat: self.seat_fares(seat, seat_map=seat_map) for seat in seats}
+
+        def cancel(conn):
+            return [(seat, *self.apply_cancellation(conn, seat, fares[seat])) for seat in seats]
+        return self.run_waitlist_write(cancel)
+
+    @instrumented
+    def join_waitlist(self, passenger, group_type=None):
+        if group_type not in GROUP_CODES:
+            return False, f"Unknown passenger type: {group_type}"
+        if any(self.get_available().free):
+            return False, "Seats are still available on this flight; book one instead."
+
+        def join(conn):
+            if conn.execute("SELECT 1 FROM waitlist WHERE flight_id = ? AND passenger = ? AND seat_id IS NULL",
+                            (self.flight_id, passenger)).fetchone():
+                return False, f"{passenger} is already on the waitlist."
+            self.waitlist.add(conn, passenger, group_type)
+            return True, f"{passenger} added to the waitlist ({self.waitlist.count(conn)} waiting)."
+        return self.run_waitlist_write(join)
+
+    @instrumented
+    def leave_waitlist(self, passenger):
+        if self.run_waitlist_write(lambda conn: self.waitlist.remove(conn, passenger)):
+            return True, f"{passenger} left the waitlist."
+        return False, f"{passenger} is not on the waitlist."
+
+    @instrumented
+    def waitlist_status(self, passenger):
+        # "Waiting", the label of the seat the passenger was promoted to, or None.
+        result = self.db.fetchone("SELECT seat_id FROM waitlist WHERE flight_id = ? AND passenger = ? "
+                                  "ORDER BY seat_id IS NULL DESC, entry_id DESC LIMIT 1", (self.flight_id, passenger))
+        if result is None:
+            return None
+        return "Waiting" if result[0] is None else self.seat_label(result[0])
+
+    def get_fare_table(self, seat_map=None):
+        seat_map = seat_map or self.get_seat_map()
+        if seat_map.fares is None:
+            seat_map.fares = build_fare_table(seat_map.status, self.seat_multipliers, self.fare_rules)
+        return seat_map.fares
+
+    def seat_fare(self, pos, group_code, seat_map=None):
+        # Current fare of one seat; the whole fare table is only built when
+        # something asks for it.
+        seat_map = seat_map or self.get_seat_map()
+        if seat_map.fares is not None:
+            return float(seat_map.fares.fares[pos, group_code])
+        return seat_fare(seat_map.status, self.seat_multipliers[pos], group_code, self.fare_rules)
+
+    def seat_fares(self, seat, table=None, seat_map=None):
+        # The seat's fare for every group code, from table (a FareTable) or
+        # the current seat map; None for an invalid seat.
+        pos = self.seat_index.get(seat)
+        if pos is None:
+            return None
+        if table is not None:
+            return table.fares[pos]
+        seat_map = seat_map or self.get_seat_map()
+        return [self.seat_fare(pos, group_code, seat_map) for group_code in range(len(GROUP_NAMES))]
+
+    def fare_table_in(self, conn):
+        # Fare table priced from the seats as conn sees them, for writes that
+        # book many seats and need the surge to follow their own bookings.
+        booked = conn.execute("SELECT count(*) FROM seats WHERE flight_id = ? AND status = ?",
+                              (self.flight_id, BOOKED)).fetchone()[0]
+        return fare_table(booked / len(self.seats) if self.seats else 0.0, self.seat_multipliers, self.fare_rules)
+
+    def calculate_price(self, group_type=None, seat=None):
+        group_code = GROUP_CODES.get(group_type, 0)
+        pos = self.seat_index.get(seat)
+        if pos is None:
+            # No seat chosen yet: base fare with the passenger discount and current surge.
+            surge = self.get_fare_table().surge
+            return round(self.fare_rules.base_fare * surge * self.fare_rules.group_multipliers[group_code], 2)
+        return self.seat_fare(pos, group_code)
+
+    @instrumented
+    def get_booked_fare(self, seat):
+        # The fare stored with the seat's booking: what the passenger paid.
+        seat_id = self.seat_id(seat)
+        result = seat_id is not None and self.db.fetchone(
+            "SELECT fare FROM seats WHERE flight_id = ? AND seat_id = ? AND status = ?",
+            (self.flight_id, seat_id, BOOKED))
+        return result[0] if result else None
+
+    @instrumented
+    def quote_fares(self, bookings):
+        # bookings is an iterable of (seat, group_type); returns {seat: fare} for
+        # every valid seat, priced in one vectorized lookup.
+        bookings = [(seat, group_type) for seat, group_type in bookings if seat in self.seat_index]
+        if not bookings:
+            return {}
+        fares = self.get_fare_table().quote([self.seat_index[seat] for seat, _ in bookings],
+                                            [GROUP_CODES.get(group_type, 0) for _, group_type in bookings])
+        return dict(zip((seat for seat, _ in bookings), fares.tolist()))
+
+    def seat_queue(self, preference, avoid_exit_rows=False, seat_map=None):
+        # The flight's queue for a preference, caught up with the seat map:
+        # seats freed since it last looked are read back from the journal.
+        seat_map = seat_map or self.get_seat_map()
+        key = (preference, avoid_exit_rows)
+        queue = self._seat_queues.get(key)
+        if queue is None:
+            queue = self._seat_queues.setdefault(key, SeatQueue(seat_ranks(self.layout, preference, avoid_exit_rows)))
+        if queue.seq is None:
+            queue.rebuild(seat_map.status, seat_map.seq)
+        elif queue.seq < seat_map.seq:
+            limit = len(self.seats) // 8
+            with self.db.connection() as conn:
+                changes = journal.changes_since(conn, self.flight_id, queue.seq, limit + 1)
+            if len(changes) > limit:
+                queue.rebuild(seat_map.status, seat_map.seq)
+            else:
+                freed = [self.seat_position(seat_id) for _, seat_id, status, _ in changes if status == AVAILABLE]
+                queue.push(freed, changes[-1][0] if changes else queue.seq)
+        return queue
+
+    @instrumented
+    def auto_assign_best_seat(self, group_type=None, preference=None):
+        # Books the free seat that best matches the preference, or the one the
+        # passenger type suggests (see skyseats.preferences).
+        if group_type not in GROUP_CODES:
+            return None, f"Unknown passenger type: {group_type}"
+        preference = preference or GROUP_PREFERENCES.get(group_type, "Front")
+        if preference not in PREFERENCES:
+            return None, f"Unknown seat preference: {preference}"
+        while True:
+            seat_map = self.get_seat_map()
+            queue = self.seat_queue(preference, group_type in EXIT_ROW_RESTRICTED, seat_map)
+            pos = queue.pop(seat_map.status, self.get_available(seat_map), self.layout.coords)
+            if pos is None:
+                return None, "No available seats to auto-assign."
+            fare = self.seat_fare(pos, GROUP_CODES[group_type], seat_map)
+            success, msg = self.book_seat(self.seats[pos], group_type, fare=fare)
+            if success:
+                return self.seats[pos], f"{msg} (Auto-assigned)"
+            # Refused but still free, e.g. held by someone in the meantime: a
+            # hold ending writes nothing to the journal, so keep it queued.
+            if self.get_seat_map().status[pos] == AVAILABLE:
+                queue.push([pos], queue.seq)
+
+    @instrumented
+    def get_seating_display(self, seat_map=None, holds=None):
+        seat_map = seat_map or self.get_seat_map()
+        holds = self.holds.snapshot()[1] if holds is None else holds
+        status, groups = seat_map.status, seat_map.groups
+        layout = []
+        for cells in self.layout.display:
+            if cells is None:
+                layout.append([("ROW GAP", "#ffffff", None)])
+                continue
+            row_display = []
+            for pos in cells:
+                if pos == AISLE:
+                    row_display.append(("AISLE", "#ffffff", None))
+                elif groups[pos]:
+                    row_display.append((self.seats[pos], GROUP_COLORS[groups[pos]], GROUP_NAMES[groups[pos]]))
+                elif status[pos] == AVAILABLE and pos in holds:
+                    row_display.append((self.seats[pos], HELD_COLOR, STATUS_NAMES[HELD]))
+                else:
+                    row_display.append((self.seats[pos], STATUS_COLORS[status[pos]], None))
+            layout.append(row_display)
+        return layout
+
+    @instrumented
+    def get_seating_html(self):
+        def build(seat_map, holds, held_rows):
+            general_fares = self.get_fare_table(seat_map).fares[:, 0].tolist()
+            fares = {seat: fare for seat, fare, code in zip(self.seats, general_fares, seat_map.status)
+                     if code == AVAILABLE}
+            return render_seat_map(self.get_seating_display(seat_map, holds), fares)
+        return self.derived("html", build)
+
+    def seat_to_index(self, seat):
+        return self.layout.coords[self.seat_index[seat]]
+
+    def index_to_seat(self, row, col):
+        return self.seats[row * self.cols + col]
+
+    def get_group_engine(self):
+        def build(seat_map, holds, held_rows):
+            occupancy = self.get_occupancy(seat_map)
+            return GroupSeatingEngine(occupancy.without(held_rows) if held_rows else occupancy, self.aisles)
+        return self.derived("group_engine", build)
+
+    def block_to_seats(self, block):
+        return [self.index_to_seat(row, col) for row, col in block.seats]
+
+    @instrumented
+    def find_group_block(self, group_size, allow_split=True):
+        block = self.get_group_engine().best_block(group_size, allow_split)
+        return self.block_to_seats(block) if block else []
+
+    @instrumented
+    def find_group_blocks(self, group_sizes, allow_split=True):
+        # Plans several groups against a private copy of the occupancy so each
+        # placement sees the seats taken by the ones before it.
+        engine = GroupSeatingEngine(self.get_available().copy(), self.aisles)
+        return [self.block_to_seats(block) if block else [] for block in engine.place(group_sizes, allow_split)]
+
+    @instrumented
+    def allocate_parties(self, parties, allow_split=True):
+        # parties is an iterable of (size, group_type). Every party is planned
+        # at once against the free, unheld seats (see plan_parties) and then
+        # booked in one transaction; a party that lost a seat in the meantime
+        # is rolled back on its own. Returns (seats, success, message) per
+        # party, in the order given.
+        parties = list(parties)
+        results = [None] * len(parties)
+        planned = []
+        for i, (size, group_type) in enumerate(parties):
+            if group_type not in GROUP_CODES:
+                results[i] = ([], False, f"Unknown passenger type: {group_type}")
+            elif size < 1:
+                results[i] = ([], False, "A party needs at least one passenger.")
+            else:
+                planned.append(i)
+        # Of two parties the same size, the one first in line for seats is placed first.
+        planned.sort(key=lambda i: WAITLIST_PRIORITY[parties[i][1]])
+        plan = plan_parties(self.get_available(), self.aisles, [parties[i][0] for i in planned], allow_split)
+        fares = self.quote_fares((seat, parties[i][1]) for i, (block, _) in zip(planned, plan) if block
+                                 for seat in self.block_to_seats(block))
+
+        def book(conn):
+            booked = []
+            for i, (block, together) in zip(planned, plan):
+                size, group_type = parties[i]
+                if block is None:
+                    booked.append((i, ([], False, f"No seats left for a party of {size}.")))
+                    continue
+                seats = self.block_to_seats(block)
+                conn.execute("SAVEPOINT party")
+                failed = next((msg for success, msg in (self.apply_booking(conn, seat, fares[seat], group_type)
+                                                        for seat in seats) if not success), None)
+                if failed is not None:
+                    conn.execute("ROLLBACK TO party")
+                    booked.append((i, ([], False, failed)))
+                elif together:
+                    booked.append((i, (seats, True, f"Party of {size} booked together.")))
+                else:
+                    booked.append((i, (seats, True, f"Party of {size} booked, but not all side by side.")))
+                conn.execute("RELEASE party")
+            return booked
+        for i, result in self.run_write(book, transaction=True):
+            results[i] = result
+        return results
+
+    @instrumented
+    def find_adjacent_seats_bfs(self, start_seat, group_size):
+        # Grows out from the start seat through free seats beside each other,
+        # never across an aisle.
+        if start_seat not in self.seat_index:
+            return []
+        occupancy = self.get_available()
+        coords, neighbors = self.layout.coords, self.layout.neighbors
+        start = self.seat_index[start_seat]
+        if not occupancy.is_free(*coords[start]):
+            return []
+        found = [start]
+        queue = deque(found)
+        while queue and len(found) < group_size:
+            for pos in neighbors[queue.popleft()]:
+                if pos not in found and occupancy.is_free(*coords[pos]):
+                    found.append(pos)
+                    queue.append(pos)
+        if len(found) < group_size:
+            return []
+        return [self.seats[pos] for pos in sorted(found[:group_size])]
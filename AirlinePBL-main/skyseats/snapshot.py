@@ -0,0 +1,46 @@
+import threading
+
+from skyseats.codes import INVALID, STATUS_NAMES
+
+
+class SeatMap:
+    __slots__ = ("version", "seats", "index", "status", "groups", "seq", "occupancy", "fares")
+
+    def __init__(self, version, seats, index, status, groups, seq=0):
+        self.version = version  # flights.version the snapshot was read at
+        self.seats = seats  # seat labels in row-major order, shared by every snapshot of a cabin
+        self.index = index  # seat label -> position in seats
+        self.status = status  # bytearray of status codes, one byte per seat
+        self.groups = groups  # bytearray of special_group codes, one byte per seat
+        self.seq = seq  # last seat_journal seq included
+        self.occupancy = None  # OccupancyIndex built on first use
+        self.fares = None  # FareTable built on first use
+
+    def get_status(self, seat):
+        pos = self.index.get(seat)
+        return STATUS_NAMES[self.status[pos] if pos is not None else INVALID]
+
+
+class SeatMapCache:
+    # Entries are (data_version, seat_map): the database data_version at which
+    # the seat map was last confirmed current. A changed data_version only
+    # means *some* flight changed, so the flight's own version is checked
+    # before the seat map is reloaded.
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key, (None, None))
+
+    def put(self, key, data_version, seat_map):
+        with self._lock:
+            self._entries[key] = (data_version, seat_map)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+seat_map_cache = SeatMapCache()
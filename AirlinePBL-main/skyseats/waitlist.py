@@ -0,0 +1,93 @@
+import heapq
+import threading
+
+from skyseats.codes import GROUP_CODES, GROUP_NAMES
+
+# Lower is served first; passengers of the same group are served in the order
+# they joined (entry ids only grow).
+WAITLIST_PRIORITY = {
+    "Disabled": 0,
+    "Elderly": 1,
+    "Infant": 2,
+    "Silent": 3,
+    None: 4,
+}
+
+
+class Waitlist:
+    # Passengers waiting for a seat on one flight. The waitlist table is the
+    # record; this heap mirrors its open entries so the next passenger is found
+    # in O(log n). Entries that left the list stay in the heap until they
+    # surface (lazy deletion), and promote() re-checks every entry against the
+    # table, so a heap that is briefly stale only costs a skipped pop.
+    # Every method that reads the table takes the caller's connection: they run
+    # inside writes, which must not check out a second one from the pool.
+    def __init__(self, flight_id, priority=WAITLIST_PRIORITY):
+        self.flight_id = flight_id
+        self.priority = [priority.get(name, max(priority.values())) for name in GROUP_NAMES]
+        self._heap = []
+        self._entries = None  # entry_id -> (passenger, group_code), loaded on first use
+        self._lock = threading.Lock()
+
+    def load(self, conn):
+        with self._lock:
+            if self._entries is not None:
+                return
+            rows = conn.execute("SELECT entry_id, passenger, group_code FROM waitlist "
+                                "WHERE flight_id = ? AND seat_id IS NULL", (self.flight_id,)).fetchall()
+            self._entries = {entry_id: (passenger, group_code) for entry_id, passenger, group_code in rows}
+            self._heap = [(self.priority[group_code], entry_id) for entry_id, (_, group_code) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def reset(self):
+        # Forget the heap; the next access reloads it from the table.
+        with self._lock:
+            self._entries = None
+            self._heap = []
+
+    def count(self, conn):
+        self.load(conn)
+        return len(self._entries)
+
+    def add(self, conn, passenger, group_type=None):
+        self.load(conn)
+        group_code = GROUP_CODES[group_type]
+        entry_id = conn.execute("INSERT INTO waitlist (flight_id, passenger, group_code) VALUES (?, ?, ?)",
+                                (self.flight_id, passenger, group_code)).lastrowid
+        with self._lock:
+            self._entries[entry_id] = (passenger, group_code)
+            heapq.heappush(self._heap, (self.priority[group_code], entry_id))
+        return entry_id
+
+    def remove(self, conn, passenger):
+        self.load(conn)
+        entry_ids = [entry_id for entry_id, in conn.execute(
+            "SELECT entry_id FROM waitlist WHERE flight_id = ? AND passenger = ? AND seat_id IS NULL",
+            (self.flight_id, passenger))]
+        conn.executemany("DELETE FROM waitlist WHERE entry_id = ?", [(entry_id,) for entry_id in entry_ids])
+        with self._lock:
+            for entry_id in entry_ids:
+                self._entries.pop(entry_id, None)
+        return len(entry_ids)
+
+    def pop(self, conn):
+        self.load(conn)
+        with self._lock:
+            while self._heap:
+                _, entry_id = heapq.heappop(self._heap)
+                entry = self._entries.pop(entry_id, None)
+                if entry is not None:
+                    return entry_id, *entry
+        return None
+
+    def promote(self, conn, seat_id):
+        # Gives seat_id to the first passenger still waiting, inside the
+        # caller's transaction. Returns (passenger, group_code) or None.
+        entry = self.pop(conn)
+        while entry is not None:
+            entry_id, passenger, group_code = entry
+            if conn.execute("UPDATE waitlist SET seat_id = ? WHERE entry_id = ? AND seat_id IS NULL",
+                            (seat_id, entry_id)).rowcount:
+                return passenger, group_code
+            entry = self.pop(conn)
+        return None
@@ -0,0 +1,101 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+class BookingWriter:
+    # Applies write callbacks from every session on one thread. Whatever has
+    # queued up while the previous transaction was committing goes into the
+    # next one (group commit), so many bookings share one fsync. Each callback
+    # runs under its own savepoint and its caller's future resolves only once
+    # the transaction holding it has committed.
+    def __init__(self, db, max_batch=256):
+        self.db = db
+        self.max_batch = max_batch
+        self.batches = 0
+        self.operations = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name="skyseats-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def submit(self, fn):
+        future = Future()
+        self._queue.put((fn, future))
+        if self._thread is None:
+            self.start()
+        return future
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self.apply(batch)
+            if stop:
+                return
+
+    def apply(self, batch):
+        def apply_all(conn):
+            outcomes = []
+            for fn, future in batch:
+                conn.execute("SAVEPOINT booking")
+                try:
+                    outcomes.append((future, fn(conn), None))
+                    conn.execute("RELEASE booking")
+                except Exception as error:
+                    conn.execute("ROLLBACK TO booking")
+                    conn.execute("RELEASE booking")
+                    outcomes.append((future, None, error))
+            return outcomes
+
+        try:
+            outcomes = self.db.write(apply_all)
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        self.batches += 1
+        self.operations += len(batch)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db):
+    with _writers_lock:
+        writer = _writers.get(db.db_path)
+        if writer is None:
+            writer = _writers[db.db_path] = BookingWriter(db)
+        return writer